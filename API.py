@@ -1,17 +1,70 @@
 # api.py
 
-from fastapi import FastAPI
-from pydantic import BaseModel
-import joblib
+import asyncio
+import os
+import signal
+from contextlib import asynccontextmanager
+from typing import Any, Dict, List, Union
+
+from fastapi import FastAPI, HTTPException
+from fastapi.responses import FileResponse, PlainTextResponse
+from pydantic import BaseModel, model_validator
+import numpy as np
 import pandas as pd
 
-model = joblib.load("logreg_model_optimise.joblib")  # Le fichier doit exister ici
+from cache_predictions import CachePredictions
+from derive import MoniteurDerive, profil_reference
+from explication import expliquer
+import jobs
+import metriques
+from metriques import etape, mesurer_validation
+from rechargement import ModeleServi
+from registre import FEATURES, OPTIMISED_MODEL_PATH, RegistreModeles, chemin_pipeline
+
+MODEL_PATH = os.environ.get("MODEL_PATH", OPTIMISED_MODEL_PATH)
+# Défini par serveur_production : pid du maître qui relaie les actions d'administration
+MAITRE_PID = int(os.environ.get("SERVEUR_MAITRE_PID", 0))
+X_TEST = pd.read_csv("data/X_test.csv")[FEATURES]
+Y_TEST = pd.read_csv("data/y_test.csv")
+
+
+def apres_bascule(ancienne, nouvelle):
+    """Nouvelle version en service : les réponses de l'ancienne ne sont plus valides"""
+    cache.purger(MODEL_PATH)
+    metriques.chargement_modeles.set(nouvelle.duree_chargement, "optimise")
+
+
+# Le modèle servi est une version remplaçable à chaud (voir rechargement.py)
+modele_servi = ModeleServi(
+    MODEL_PATH, X_TEST, Y_TEST,
+    precision_min=float(os.environ.get("MODEL_MIN_ACCURACY", 0.6)),
+    apres_bascule=apres_bascule,
+)
+metriques.chargement_modeles.set(modele_servi.courant.duree_chargement, "optimise")
+
+# Pipelines du dossier Pipeline/, chargés à la demande (un registre par worker)
+registre = RegistreModeles(max_resident=int(os.environ.get("MAX_RESIDENT_MODELS", 3)))
 
-FEATURES = ['ca', 'age', 'sex', 'cp', 'trestbps', 'chol', 'fbs',
-            'restecg', 'thalach', 'oldpeak']
+# Cache des réponses : les mêmes vecteurs patients sont souvent re-soumis
+cache = CachePredictions(
+    max_size=int(os.environ.get("PREDICTION_CACHE_SIZE", 10000)),
+    ttl=float(os.environ.get("PREDICTION_CACHE_TTL", 300)),
+)
+
+# Distribution des entrées comparée à data/clean_heart_data.csv (un moniteur par worker)
+moniteur_derive = MoniteurDerive(
+    profil_reference(),
+    fenetre=int(os.environ.get("DRIFT_WINDOW", 10000)),
+    rafraichir=float(os.environ.get("DRIFT_REFRESH", 10)),
+)
+
+# Travaux longs (scoring de fichiers, évaluations) : file SQLite et pool de processus borné.
+# JOBS_MAX_WORKERS vaut pour tout le déploiement, quel que soit le nombre de workers API
+file_jobs = jobs.FileJobs()
+repartiteur_jobs = jobs.RepartiteurJobs(file_jobs, max_workers=int(os.environ.get("JOBS_MAX_WORKERS", 1)))
 
 class PatientData(BaseModel):
-    ca: int
+    ca: float  # valeurs imputées non entières dans les données d'entraînement
     age: int
     sex: int
     cp: int
@@ -21,9 +74,146 @@ class PatientData(BaseModel):
     restecg: int
     thalach: float
     oldpeak: float
-    
 
-app = FastAPI()
+
+class PatientColumns(BaseModel):
+    """Lot de patients au format colonnes : une liste de valeurs par variable"""
+    ca: List[float]
+    age: List[int]
+    sex: List[int]
+    cp: List[int]
+    trestbps: List[float]
+    chol: List[float]
+    fbs: List[int]
+    restecg: List[int]
+    thalach: List[float]
+    oldpeak: List[float]
+
+    @model_validator(mode="after")
+    def verifier_longueurs(self):
+        longueurs = {len(getattr(self, f)) for f in FEATURES}
+        if len(longueurs) > 1:
+            raise ValueError("Toutes les colonnes doivent avoir la même longueur")
+        return self
+
+
+class JobRequest(BaseModel):
+    type: str
+    params: Dict[str, Any] = {}
+
+
+def decider(probas, classes, calibration=None):
+    """Étiquettes et confiances ; probabilités calibrées et seuil de seuils.py s'ils sont exportés"""
+    if calibration is not None:
+        return calibration.decider(probas, classes)
+    idx = probas.argmax(axis=1)
+    return classes[idx], probas[np.arange(len(idx)), idx]
+
+
+def scorer(X, version):
+    """Score vectorisé : étiquette et confiance issues d'un seul predict_proba"""
+    return decider(version.predict_proba(X), version.classes_, version.calibration)
+
+
+def identite_calibration(calibration):
+    return None if calibration is None else (calibration.methode, calibration.a, calibration.b, calibration.seuil)
+
+
+def cle_patient(data):
+    """Vecteur canonique (ordre FEATURES, valeurs flottantes) d'un patient"""
+    return tuple(float(getattr(data, f)) for f in FEATURES)
+
+
+def vers_matrice(patients):
+    """Convertit une liste de PatientData ou un PatientColumns en matrice (n, FEATURES)"""
+    if isinstance(patients, PatientColumns):
+        return np.column_stack([np.asarray(getattr(patients, f), dtype=np.float64) for f in FEATURES])
+    X = np.empty((len(patients), len(FEATURES)), dtype=np.float64)
+    for i, p in enumerate(patients):
+        X[i] = [getattr(p, f) for f in FEATURES]
+    return X
+
+
+def expliquer_lot(pipeline, X, probas, calibration=None):
+    """Contributions par variable de chaque patient, calculées en un appel pour tout le lot
+
+    base + somme des contributions donne le score du modèle *non calibré* pour la classe 1,
+    dans l'espace indiqué (log-odds ou probabilité) ; `model_probability` est cette
+    probabilité brute. `prediction` et `confidence` sont la réponse servie, donc calibrée
+    et seuillée quand une calibration est exportée (`calibrated`).
+    """
+    try:
+        contributions, bases, espace = expliquer(pipeline, X)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    labels, confiances = decider(probas, pipeline.classes_, calibration)
+    explications = [
+        {
+            "prediction": int(label),
+            "confidence": round(float(confiance), 4),
+            "model_probability": round(float(p1), 4),
+            "calibrated": calibration is not None,
+            "base": round(float(base), 4),
+            "contributions": dict(zip(FEATURES, np.round(ligne, 4).tolist())),
+        }
+        for label, confiance, p1, base, ligne in zip(labels, confiances, probas[:, -1], bases, contributions)
+    ]
+    return explications, espace
+
+
+@asynccontextmanager
+async def lifespan(app):
+    # Démarré dans chaque worker (après un éventuel fork), jamais dans le maître
+    intervalle = float(os.environ.get("MODEL_WATCH_INTERVAL", 2))
+    if intervalle > 0:
+        modele_servi.surveiller(intervalle)
+    if repartiteur_jobs.max_workers > 0:
+        repartiteur_jobs.demarrer()
+    if MAITRE_PID:
+        # Actions d'administration relayées par le maître de serveur_production
+        boucle = asyncio.get_running_loop()
+        boucle.add_signal_handler(signal.SIGUSR1, modele_servi.recharger_en_arriere_plan, True)
+        boucle.add_signal_handler(signal.SIGUSR2, moniteur_derive.reinitialiser)
+    arret_export = metriques.registre.exporter_periodiquement()
+    yield
+    arret_export.set()
+    modele_servi.arreter()
+    repartiteur_jobs.arreter()
+
+
+app = FastAPI(lifespan=lifespan)
+app.add_middleware(metriques.MiddlewareMetriques)
+
+
+@metriques.registre.collecteur
+def metriques_registre_et_cache():
+    """Temps de chargement des pipelines et état du cache, lus au moment du scraping"""
+    modeles = registre.decrire()
+    charges = metriques.Jauge("api_models_resident", "Pipelines résidents en mémoire")
+    charges.set(sum(m["loaded"] for m in modeles))
+    for m in modeles:
+        if m["load_seconds"] is not None:
+            metriques.chargement_modeles.set(m["load_seconds"], m["code"])
+    stats = cache.statistiques()
+    compteurs = []
+    for nom in ("hits", "misses", "evictions", "expirations"):
+        c = metriques.Compteur(f"api_prediction_cache_{nom}_total", f"Cache de prédictions : {nom}")
+        c.inc(stats[nom])
+        compteurs.append(c)
+    return [charges, *compteurs]
+
+
+@metriques.registre.collecteur
+def metriques_derive():
+    """PSI par variable de la fenêtre courante"""
+    rapport = moniteur_derive.rapport()
+    jauge = metriques.Jauge("api_input_drift_psi", "PSI des entrées vs clean_heart_data", ("feature",))
+    for f, v in rapport["variables"].items():
+        if "psi" in v:
+            jauge.set(v["psi"], f)
+    observations = metriques.Jauge("api_input_drift_observations", "Patients dans la fenêtre de dérive")
+    observations.set(rapport["observations"])
+    return [jauge, observations]
 
 @app.get("/")
 def read_root():
@@ -31,10 +221,190 @@ def read_root():
 
 @app.post("/predict")
 def predict(data: PatientData):
-    input_df = pd.DataFrame([data.dict()])[FEATURES]
-    prediction = model.predict(input_df)[0]
-    proba = model.predict_proba(input_df).max()
+    mesurer_validation("/predict")
+    # Version lue une seule fois : la requête se termine sur elle même si une bascule survient
+    version = modele_servi.courant
+    with etape("/predict", "cache"):
+        features = cle_patient(data)
+        moniteur_derive.observer(features)
+        reponse = cache.lire(version.identite, features)
+    if reponse is not None:
+        return reponse
+    # Lecture directe des champs validés, sans DataFrame intermédiaire
+    with etape("/predict", "construction"):
+        X = np.array(features, dtype=np.float64).reshape(1, -1)
+    with etape("/predict", "predict_proba"):
+        labels, probas = scorer(X, version)
+    reponse = {
+        "prediction": int(labels[0]),
+        "confidence": round(float(probas[0]), 4)
+    }
+    cache.ecrire(version.identite, features, reponse)
+    return reponse
+
+@app.post("/predict/batch")
+def predict_batch(data: Union[List[PatientData], PatientColumns]):
+    mesurer_validation("/predict/batch")
+    version = modele_servi.courant
+    with etape("/predict/batch", "construction"):
+        X = vers_matrice(data)
+    if len(X) == 0:
+        return {"predictions": []}
+    moniteur_derive.observer(X)
+    with etape("/predict/batch", "predict_proba"):
+        labels, probas = scorer(X, version)
+    # Les résultats sont renvoyés dans l'ordre des patients reçus
     return {
-        "prediction": int(prediction),
-        "confidence": round(float(proba), 4)
+        "predictions": [
+            {"prediction": int(label), "confidence": round(float(proba), 4)}
+            for label, proba in zip(labels, probas)
+        ]
     }
+
+@app.get("/models")
+def list_models():
+    return {"models": registre.decrire()}
+
+@app.post("/predict/{model_code}")
+def predict_with_model(model_code: str, data: PatientData):
+    route = "/predict/{model_code}"
+    mesurer_validation(route)
+    try:
+        with etape(route, "chargement_modele"):
+            pipeline = registre.obtenir(model_code)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu : {model_code}")
+    calibration = registre.calibration(model_code)
+    with etape(route, "cache"):
+        features = cle_patient(data)
+        moniteur_derive.observer(features)
+        # Une nouvelle calibration change les réponses : elle fait partie de l'identité
+        identite = (*cache.identite(chemin_pipeline(model_code)), identite_calibration(calibration))
+        reponse = cache.lire(identite, features)
+    if reponse is not None:
+        return reponse
+    with etape(route, "construction"):
+        input_df = pd.DataFrame([features], columns=FEATURES)
+    with etape(route, "predict_proba"):
+        labels, probas = decider(pipeline.predict_proba(input_df), pipeline.classes_, calibration)
+    reponse = {
+        "model": model_code,
+        "prediction": int(labels[0]),
+        "confidence": round(float(probas[0]), 4)
+    }
+    cache.ecrire(identite, features, reponse)
+    return reponse
+
+@app.post("/explain")
+def explain(data: PatientData):
+    version = modele_servi.courant
+    X = np.array(cle_patient(data), dtype=np.float64).reshape(1, -1)
+    explications, espace = expliquer_lot(version.pipeline, X, version.predict_proba(X), version.calibration)
+    return {"space": espace, **explications[0]}
+
+@app.post("/explain/batch")
+def explain_batch(data: Union[List[PatientData], PatientColumns]):
+    version = modele_servi.courant
+    X = vers_matrice(data)
+    if len(X) == 0:
+        return {"space": None, "explanations": []}
+    explications, espace = expliquer_lot(version.pipeline, X, version.predict_proba(X), version.calibration)
+    return {"space": espace, "explanations": explications}
+
+@app.post("/explain/{model_code}")
+def explain_with_model(model_code: str, data: PatientData):
+    try:
+        pipeline = registre.obtenir(model_code)
+    except KeyError:
+        raise HTTPException(status_code=404, detail=f"Modèle inconnu : {model_code}")
+    X = pd.DataFrame([cle_patient(data)], columns=FEATURES)
+    explications, espace = expliquer_lot(pipeline, X, pipeline.predict_proba(X), registre.calibration(model_code))
+    return {"model": model_code, "space": espace, **explications[0]}
+
+@app.post("/jobs", status_code=202)
+def submit_job(demande: JobRequest):
+    if repartiteur_jobs.max_workers == 0:
+        # Aucun répartiteur dans ce déploiement : le travail resterait en attente indéfiniment
+        raise HTTPException(status_code=503, detail="Travaux désactivés (JOBS_MAX_WORKERS=0)")
+    try:
+        jobs.valider(demande.type, demande.params)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    job_id = file_jobs.soumettre(demande.type, demande.params)
+    repartiteur_jobs.reveiller()
+    return {"id": job_id, "status": jobs.EN_ATTENTE}
+
+@app.get("/jobs")
+def list_jobs(limit: int = 50):
+    return {"jobs": [{k: v for k, v in job.items() if k != "result"} for job in file_jobs.lister(limit)]}
+
+def _job_ou_404(job_id):
+    job = file_jobs.obtenir(job_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail=f"Travail inconnu : {job_id}")
+    return job
+
+@app.get("/jobs/{job_id}")
+def job_status(job_id: str):
+    job = _job_ou_404(job_id)
+    job.pop("result")
+    return job
+
+@app.get("/jobs/{job_id}/result")
+def job_result(job_id: str, download: bool = False):
+    job = _job_ou_404(job_id)
+    if job["status"] == jobs.ECHEC:
+        raise HTTPException(status_code=409, detail={"status": job["status"], "error": job["error"]})
+    if job["status"] != jobs.TERMINE:
+        raise HTTPException(status_code=409, detail={"status": job["status"], "progress": job["progress"]})
+    if download:
+        sortie = job["result"].get("output")
+        # Seuls les fichiers écrits dans JOBS_DIR sont servis, quel que soit le contenu de la base
+        if sortie is not None:
+            sortie = os.path.realpath(sortie)
+        if (sortie is None or not sortie.startswith(os.path.realpath(jobs.JOBS_DIR) + os.sep)
+                or not os.path.isfile(sortie)):
+            raise HTTPException(status_code=404, detail="Aucun fichier de résultats pour ce travail")
+        extension = os.path.splitext(sortie)[1].lstrip(".")
+        return FileResponse(sortie, filename=os.path.basename(sortie),
+                            media_type=jobs.FORMATS_SORTIE.get(extension, "application/octet-stream"))
+    return {"id": job_id, "type": job["type"], "result": job["result"]}
+
+def diffuser(sig):
+    """Sous serveur_production, demande au maître de relayer le signal à tous les workers"""
+    if not MAITRE_PID:
+        return False
+    os.kill(MAITRE_PID, sig)
+    return True
+
+@app.get("/cache/stats")
+def cache_stats():
+    # Propre au worker qui répond sous serveur_production
+    return {**cache.statistiques(), "worker": os.getpid()}
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    return PlainTextResponse(metriques.registre.rendre(), media_type="text/plain; version=0.0.4")
+
+@app.get("/drift")
+def drift(force: bool = False):
+    # Fenêtre du worker qui répond sous serveur_production
+    return {**moniteur_derive.rapport(force=force), "worker": os.getpid()}
+
+@app.post("/drift/reset")
+def drift_reset():
+    if not diffuser(signal.SIGUSR2):
+        moniteur_derive.reinitialiser()
+    return {"status": "reset"}
+
+@app.get("/admin/model")
+def model_status():
+    return {"current": modele_servi.courant.decrire(), "last_reload": modele_servi.dernier_resultat,
+            "worker": os.getpid()}
+
+@app.post("/admin/reload", status_code=202)
+def reload_model():
+    # Chargement et validation en arrière-plan : aucune requête n'en paie le coût
+    if not diffuser(signal.SIGUSR1):
+        modele_servi.recharger_en_arriere_plan(force=True)
+    return {"status": "reloading", "all_workers": bool(MAITRE_PID), "current": modele_servi.courant.decrire()}
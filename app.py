@@ -1,9 +1,6 @@
+import importlib
+
 import streamlit as st
-import pandas as pd
-from visualisation import afficher_page_visualisation
-from introduction import page_introduction
-from modelisation import page_modelisation
-from prediction import page_prediction  
 
 # Définir la configuration de la page en premier
 st.set_page_config(page_title="Classification des maladies cardiaques", page_icon="📊", layout="wide")
@@ -184,12 +181,26 @@ st.markdown("""
     Vous pouvez naviguer entre les différentes pages pour découvrir les insights cachés dans les données.
 """)
 
+# Chaque page est importée à sa première ouverture seulement : matplotlib, seaborn,
+# scikit-learn ou joblib ne sont chargés que par les pages qui en ont besoin
 PAGES = {
-    "Introduction": page_introduction,
-    "Modélisation": lambda: page_modelisation(),  # Passer data ici
-    "Visualisation": lambda:afficher_page_visualisation(data),
-    "Prédiction": page_prediction   # Pas besoin de data ici
+    "Introduction": ("introduction", "page_introduction"),
+    "Modélisation": ("modelisation", "page_modelisation"),
+    "Visualisation": ("visualisation", "afficher_page_visualisation"),
+    "Prédiction": ("prediction", "page_prediction")
 }
+
+
+def afficher_page(nom):
+    module_name, function_name = PAGES[nom]
+    module = importlib.import_module(module_name)
+    if nom == "Visualisation":
+        # Seule page qui a besoin du jeu de données complet
+        data = module.charger_donnees()
+        module.afficher_page_visualisation(data)
+    else:
+        getattr(module, function_name)()
+
 # Sélection de la page via un menu déroulant dans la barre latérale
 page = st.sidebar.selectbox(
     "Choisissez une page",
@@ -212,8 +223,5 @@ st.sidebar.markdown("### 📊 Classification des Maladies cardiaques")
 st.sidebar.markdown("Cette analyse est basée sur les facteurs influençant le fait pour un individus d'etre atteint d'une maladie cardiaques.")
 st.sidebar.markdown("---")
 
-# Chargement des données
-data = pd.read_csv("data/clean_heart_data.csv", sep=";")
-
 # Appel de la fonction de la page sélectionnée
-PAGES[page]()  
\ No newline at end of file
+afficher_page(page)
@@ -0,0 +1,107 @@
+# artefacts.py
+# Format d'artefact compact pour les modèles servis : chaque pipeline est ré-exporté
+# sans compression par joblib, ce qui permet de le recharger avec mmap_mode="c". Les
+# tableaux NumPy (coefficients, vecteurs de support, données k-NN...) sont alors
+# projetés depuis le cache de pages du système et partagés entre processus au lieu
+# d'être désérialisés dans une copie privée par worker ou par session. Le mode "c"
+# (copy-on-write) est nécessaire car libsvm exige des buffers modifiables ; tant
+# qu'aucune écriture n'a lieu, les pages restent partagées.
+# Chaque artefact est nommé d'après le chemin résolu de sa source et accompagné de la
+# signature (taille, date en ns) de la source exportée : il n'est utilisé que si la
+# source est restée identique, y compris après la restauration d'un fichier plus ancien.
+#
+#   python artefacts.py            # exporte Pipeline/*.pkl et le modèle optimisé
+
+import glob
+import hashlib
+import json
+import os
+import sys
+
+import joblib
+
+from registre import OPTIMISED_MODEL_PATH, PIPELINES_DIR
+
+ARTEFACTS_DIR = os.path.join(".cache", "artefacts")
+
+
+def chemin_artefact(chemin_source, dossier=ARTEFACTS_DIR):
+    """Artefact propre au chemin résolu de la source (deux fichiers homonymes ne se partagent rien)"""
+    chemin = os.path.realpath(chemin_source)
+    nom = os.path.splitext(os.path.basename(chemin))[0]
+    empreinte = hashlib.sha256(chemin.encode()).hexdigest()[:12]
+    return os.path.join(dossier, f"{nom}-{empreinte}.joblib")
+
+
+def chemin_signature(artefact):
+    return f"{artefact}.source.json"
+
+
+def signature_source(chemin_source):
+    stat = os.stat(chemin_source)
+    return {"source": os.path.realpath(chemin_source), "size": stat.st_size, "mtime_ns": stat.st_mtime_ns}
+
+
+def a_jour(chemin_source, dossier=ARTEFACTS_DIR):
+    """Vrai si l'artefact a été exporté depuis la source dans son état actuel"""
+    artefact = chemin_artefact(chemin_source, dossier)
+    try:
+        with open(chemin_signature(artefact), encoding="utf-8") as f:
+            signature = json.load(f)
+    except (OSError, ValueError):
+        return False
+    return os.path.exists(artefact) and signature == signature_source(chemin_source)
+
+
+def _ecrire_atomique(chemin, ecrire):
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    ecrire(tmp)
+    os.replace(tmp, chemin)
+
+
+def exporter(chemin_source, dossier=ARTEFACTS_DIR):
+    """Ré-exporte un modèle en artefact non compressé, chargeable par memory-mapping"""
+    # Signature relevée avant la lecture : une source modifiée entre-temps sera ré-exportée
+    signature = signature_source(chemin_source)
+    modele = joblib.load(chemin_source)
+    os.makedirs(dossier, exist_ok=True)
+    artefact = chemin_artefact(chemin_source, dossier)
+    # compress=0 : chargement le plus rapide et condition nécessaire à mmap_mode
+    _ecrire_atomique(artefact, lambda tmp: joblib.dump(modele, tmp, compress=0))
+
+    def ecrire_signature(tmp):
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(signature, f)
+    _ecrire_atomique(chemin_signature(artefact), ecrire_signature)
+    return artefact
+
+
+def charger_modele(chemin_source, dossier=ARTEFACTS_DIR):
+    """Charge l'artefact memory-mappé s'il est à jour, sinon le fichier d'origine"""
+    if a_jour(chemin_source, dossier):
+        return joblib.load(chemin_artefact(chemin_source, dossier), mmap_mode="c")
+    return joblib.load(chemin_source)
+
+
+def taille_chargee(chemin_source, dossier=ARTEFACTS_DIR):
+    """Octets du fichier que charger_modele lit : l'artefact non compressé, proche de
+    l'empreinte mémoire du modèle, ou à défaut la source"""
+    if a_jour(chemin_source, dossier):
+        return os.path.getsize(chemin_artefact(chemin_source, dossier))
+    return os.path.getsize(chemin_source)
+
+
+def sources_par_defaut():
+    return sorted(glob.glob(os.path.join(PIPELINES_DIR, "*.pkl"))) + [OPTIMISED_MODEL_PATH]
+
+
+def main(argv=None):
+    sources = argv if argv else sources_par_defaut()
+    for source in sources:
+        artefact = exporter(source)
+        print(f"{source} -> {artefact} ({os.path.getsize(artefact):,} octets)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main(sys.argv[1:]))
@@ -0,0 +1,87 @@
+# benchmarks/bench_artefacts.py
+# Compare, pour chaque pipeline, le chargement joblib d'origine et l'artefact
+# memory-mappé (artefacts.py) : temps de chargement, RSS et USS (mémoire privée au
+# processus, hors pages partagées). Chaque mesure a lieu dans un processus neuf.
+#
+#   python artefacts.py && python benchmarks/bench_artefacts.py
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+
+import artefacts  # noqa: E402
+
+MESURE = """
+import gc, json, sys, time, warnings
+warnings.filterwarnings("ignore")
+import psutil, joblib, numpy, sklearn, xgboost  # imports hors mesure
+import artefacts
+# Premier chargement hors mesure : importe les modules scikit-learn/xgboost du modèle
+joblib.load(sys.argv[1])
+p = psutil.Process(); gc.collect()
+avant = p.memory_full_info()
+debut = time.perf_counter()
+if sys.argv[2] == "mmap":
+    modele = artefacts.charger_modele(sys.argv[1])
+else:
+    modele = joblib.load(sys.argv[1])
+duree = time.perf_counter() - debut
+apres = p.memory_full_info()
+print(json.dumps({"ms": duree * 1000, "rss": apres.rss - avant.rss, "uss": apres.uss - avant.uss}))
+"""
+
+
+def mesurer(source, mode, repetitions):
+    mesures = []
+    for _ in range(repetitions):
+        sortie = subprocess.run([sys.executable, "-c", MESURE, source, mode], cwd=RACINE,
+                                capture_output=True, text=True, check=True).stdout
+        mesures.append(json.loads(sortie.strip().splitlines()[-1]))
+    return {cle: sorted(m[cle] for m in mesures)[len(mesures) // 2] for cle in mesures[0]}
+
+
+def pipeline_synthetique(n_lignes):
+    """k-NN ajusté sur n_lignes × 10 : ses données d'entraînement dominent l'artefact"""
+    import joblib
+    import numpy as np
+    from sklearn.neighbors import KNeighborsClassifier
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    X, y = rng.normal(size=(n_lignes, 10)), rng.integers(0, 2, n_lignes)
+    pipeline = Pipeline([("scaler", StandardScaler()), ("classifier", KNeighborsClassifier())]).fit(X, y)
+    chemin = os.path.join(artefacts.ARTEFACTS_DIR, f"synthetique_knn_{n_lignes}.pkl")
+    os.makedirs(artefacts.ARTEFACTS_DIR, exist_ok=True)
+    joblib.dump(pipeline, chemin, compress=3)  # comme un pickle distribué compressé
+    return chemin
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Chargement pickle/joblib vs artefact memory-mappé")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--synthetique", type=int, default=0,
+                        help="Ajoute un k-NN synthétique entraîné sur N lignes (modèle volumineux)")
+    args = parser.parse_args()
+
+    print(f"{'Modèle':<44}{'joblib ms':>10}{'mmap ms':>9}{'joblib USS':>12}{'mmap USS':>10}"
+          f"{'joblib RSS':>12}{'mmap RSS':>10}")
+    sources = artefacts.sources_par_defaut()
+    if args.synthetique:
+        sources.append(os.path.relpath(pipeline_synthetique(args.synthetique), RACINE))
+    for source in sources:
+        if not artefacts.a_jour(source):
+            artefacts.exporter(source)
+        a = mesurer(source, "joblib", args.repetitions)
+        b = mesurer(source, "mmap", args.repetitions)
+        print(f"{source:<44}{a['ms']:>10.2f}{b['ms']:>9.2f}{a['uss'] // 1024:>10} k{b['uss'] // 1024:>8} k"
+              f"{a['rss'] // 1024:>10} k{b['rss'] // 1024:>8} k")
+
+
+if __name__ == "__main__":
+    main()
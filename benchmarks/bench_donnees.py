@@ -0,0 +1,73 @@
+# benchmarks/bench_donnees.py
+# Compare le chargement CSV (pd.read_csv) et Arrow memory-mappé (donnees.charger) :
+# temps de chargement, mémoire du DataFrame et RSS du processus.
+#
+# donnees.charger convertit sans copie (split_blocks, self_destruct) : les colonnes
+# numériques sans valeur manquante restent des vues en lecture seule sur le fichier
+# Arrow. Copie restante : colonnes avec valeurs manquantes ou non numériques, et
+# l'index pandas. Le mode « arrow copie » mesure l'ancienne conversion to_pandas().
+#
+#   python benchmarks/bench_donnees.py [--repetitions 50] [--facteur 1]
+
+import argparse
+import gc
+import os
+import sys
+import time
+
+import pandas as pd
+import psutil
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import donnees  # noqa: E402
+
+
+def mesurer(charger, repetitions):
+    processus = psutil.Process()
+    gc.collect()
+    rss_avant = processus.memory_info().rss
+    debut = time.perf_counter()
+    for _ in range(repetitions):
+        df = charger()
+    duree = (time.perf_counter() - debut) / repetitions
+    rss_apres = processus.memory_info().rss
+    return {
+        "ms_par_chargement": round(duree * 1000, 3),
+        "octets_dataframe": int(df.memory_usage(deep=True).sum()),
+        "delta_rss_octets": rss_apres - rss_avant,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--repetitions", type=int, default=50)
+    parser.add_argument("--facteur", type=int, default=1,
+                        help="Duplique les données N fois pour simuler un gros volume")
+    args = parser.parse_args()
+
+    dossier = donnees.CACHE_DIR
+    if args.facteur > 1:
+        # Jeu agrandi écrit à côté des sources, avec son propre cache Arrow
+        csv, sep, type_mesures = donnees.SOURCES["clean_heart_data"]
+        gros_csv = os.path.join(dossier, f"clean_heart_data_x{args.facteur}.csv")
+        os.makedirs(dossier, exist_ok=True)
+        pd.concat([pd.read_csv(csv, sep=sep)] * args.facteur).to_csv(gros_csv, sep=sep, index=False)
+        donnees.SOURCES["bench"] = (gros_csv, sep, type_mesures)
+        nom, csv = "bench", gros_csv
+    else:
+        nom = "clean_heart_data"
+        csv, sep, _ = donnees.SOURCES[nom]
+
+    donnees.convertir(nom)
+    resultats = {
+        "csv (pd.read_csv)": mesurer(lambda: pd.read_csv(csv, sep=sep), args.repetitions),
+        "arrow copie (to_pandas)": mesurer(lambda: donnees.charger_table(nom).to_pandas(), args.repetitions),
+        "arrow (donnees.charger)": mesurer(lambda: donnees.charger(nom), args.repetitions),
+    }
+    print(f"{'Méthode':<26}{'ms/chargement':>15}{'DataFrame (o)':>16}{'Δ RSS (o)':>14}")
+    for methode, r in resultats.items():
+        print(f"{methode:<26}{r['ms_par_chargement']:>15}{r['octets_dataframe']:>16}{r['delta_rss_octets']:>14}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+# benchmarks/bench_graphiques.py
+# Temps de rendu des graphiques de la page Visualisation selon le nombre de lignes :
+# seaborn sur les lignes brutes contre graphiques_agreges (agrégats d'abord).
+#
+#   python benchmarks/bench_graphiques.py [--tailles 1000 10000 100000 1000000] [--max-brut 100000]
+
+import argparse
+import io
+import os
+import sys
+import time
+import warnings
+
+import matplotlib
+matplotlib.use("Agg")
+import matplotlib.pyplot as plt  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+import seaborn as sns  # noqa: E402
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import graphiques_agreges as ga  # noqa: E402
+
+ETIQUETTES_CP = {1: "Typique", 2: "Atypique", 3: "Non-angineux", 4: "Asymptomatique"}
+
+
+def jeu_de_donnees(n, graine=0):
+    base = pd.read_csv("data/clean_heart_data.csv", sep=";")
+    data = base.sample(n, replace=True, random_state=graine).reset_index(drop=True)
+    # Léger bruit pour éviter que les gros jeux ne soient que des copies exactes
+    data["chol"] += np.random.default_rng(graine).normal(0, 5, n)
+    data["cp"] = data["cp"].map(ETIQUETTES_CP).astype("category")
+    return data
+
+
+def rendre(tracer, figsize=(10, 6)):
+    fig, ax = plt.subplots(figsize=figsize)
+    debut = time.perf_counter()
+    tracer(ax)
+    fig.savefig(io.BytesIO(), format="png", dpi=120)
+    duree = time.perf_counter() - debut
+    plt.close(fig)
+    return duree
+
+
+GRAPHIQUES = {
+    "histogramme": (
+        lambda d, ax: sns.histplot(d["chol"], kde=True, bins=30, ax=ax),
+        lambda d, ax: ga.tracer_histogramme(ax, ga.agreger_histogramme(d["chol"], bins=30)),
+    ),
+    "boxplot": (
+        lambda d, ax: sns.boxplot(x=d["chol"], ax=ax),
+        lambda d, ax: ga.tracer_boxplot(ax, ga.agreger_boxplot(d["chol"]), vertical=False),
+    ),
+    "comptage": (
+        lambda d, ax: sns.countplot(x="cp", data=d, ax=ax),
+        lambda d, ax: ga.tracer_comptes(ax, ga.agreger_comptes(d["cp"])),
+    ),
+    "boxplot croisé": (
+        lambda d, ax: sns.boxplot(x="cp", y="chol", data=d, ax=ax),
+        lambda d, ax: ga.tracer_boxplot(ax, ga.agreger_boxplots_groupes(d, "chol", "cp")),
+    ),
+    "moyennes croisées": (
+        lambda d, ax: sns.barplot(x="cp", y="chol", data=d, estimator="mean", ax=ax),
+        lambda d, ax: ga.tracer_moyennes(ax, ga.agreger_moyennes(d, "chol", "cp")),
+    ),
+}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de rendu : seaborn brut vs agrégats")
+    parser.add_argument("--tailles", type=int, nargs="*", default=[1_000, 10_000, 100_000, 1_000_000])
+    parser.add_argument("--max-brut", type=int, default=100_000,
+                        help="Taille au-delà de laquelle seaborn brut n'est plus mesuré")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+    os.chdir(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+    print(f"{'Graphique':<20}{'lignes':>10}{'seaborn (s)':>14}{'agrégats (s)':>15}{'gain':>8}")
+    for n in args.tailles:
+        data = jeu_de_donnees(n)
+        for nom, (brut, agrege) in GRAPHIQUES.items():
+            t_agrege = rendre(lambda ax: agrege(data, ax))
+            if n <= args.max_brut:
+                t_brut = rendre(lambda ax: brut(data, ax))
+                print(f"{nom:<20}{n:>10,}{t_brut:>14.3f}{t_agrege:>15.3f}{t_brut / t_agrege:>7.1f}x")
+            else:
+                print(f"{nom:<20}{n:>10,}{'—':>14}{t_agrege:>15.3f}{'':>8}")
+
+
+if __name__ == "__main__":
+    main()
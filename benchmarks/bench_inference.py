@@ -0,0 +1,189 @@
+# benchmarks/bench_inference.py
+# Benchmark reproductible de l'inférence : pour chaque pipeline de Pipeline/ et pour le
+# modèle optimisé, temps de chargement, empreinte mémoire, latence unitaire (p50/p95/p99)
+# et débit par taille de lot ; puis latence des routes de l'API via un client de test.
+# Le rapport JSON produit peut être comparé à un rapport précédent.
+#
+#   python benchmarks/bench_inference.py --sortie benchmarks/resultats/ref.json
+#   python benchmarks/bench_inference.py --comparer benchmarks/resultats/ref.json
+
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import warnings
+from datetime import datetime
+
+import joblib
+import numpy as np
+import pandas as pd
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, RACINE)
+os.chdir(RACINE)
+
+from registre import FEATURES, MODEL_NAME_MAP, OPTIMISED_MODEL_PATH, chemin_pipeline  # noqa: E402
+
+RESULTATS_DIR = os.path.join("benchmarks", "resultats")
+TAILLES_LOT = (1, 10, 100, 1000, 10000)
+SEUIL_REGRESSION = 1.20  # +20 % de temps = régression signalée
+
+
+def percentiles(durees):
+    ms = np.asarray(durees) * 1000
+    return {
+        "p50_ms": round(float(np.percentile(ms, 50)), 4),
+        "p95_ms": round(float(np.percentile(ms, 95)), 4),
+        "p99_ms": round(float(np.percentile(ms, 99)), 4),
+        "mean_ms": round(float(ms.mean()), 4),
+    }
+
+
+def chronometrer(fonction, iterations, echauffement=5):
+    for _ in range(echauffement):
+        fonction()
+    durees = []
+    for _ in range(iterations):
+        debut = time.perf_counter()
+        fonction()
+        durees.append(time.perf_counter() - debut)
+    return durees
+
+
+def mesurer_chargement(chemin, repetitions):
+    tracemalloc.start()
+    debut = time.perf_counter()
+    model = joblib.load(chemin)
+    premiere = time.perf_counter() - debut
+    memoire = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    durees = chronometrer(lambda: joblib.load(chemin), repetitions, echauffement=0)
+    return model, {
+        "file_bytes": os.path.getsize(chemin),
+        "memory_bytes": memoire,
+        "first_load_ms": round(premiere * 1000, 3),
+        **{f"load_{k}": v for k, v in percentiles(durees).items()},
+    }
+
+
+def mesurer_modele(chemin, X, iterations, repetitions_chargement):
+    model, resultat = mesurer_chargement(chemin, repetitions_chargement)
+    ligne = X.iloc[[0]]
+    resultat["single_row"] = percentiles(chronometrer(lambda: model.predict_proba(ligne), iterations))
+    resultat["batch_rows_per_second"] = {}
+    for taille in TAILLES_LOT:
+        lot = X.sample(taille, replace=True, random_state=0).reset_index(drop=True)
+        repetitions = max(3, min(iterations, 20000 // taille))
+        durees = chronometrer(lambda: model.predict_proba(lot), repetitions, echauffement=2)
+        resultat["batch_rows_per_second"][str(taille)] = round(taille / float(np.median(durees)), 1)
+    return resultat
+
+
+def mesurer_api(X, iterations):
+    from fastapi.testclient import TestClient
+
+    debut = time.perf_counter()
+    import API
+    import_ms = round((time.perf_counter() - debut) * 1000, 3)
+    client = TestClient(API.app)
+    patients = X.astype(int).to_dict("records")
+    API.cache.max_size = 0  # mesure du chemin de calcul, pas du cache
+    i = iter(range(10 ** 9))
+
+    def predict():
+        client.post("/predict", json=patients[next(i) % len(patients)])
+
+    resultat = {"import_ms": import_ms, "/predict": percentiles(chronometrer(predict, iterations))}
+    lot = (patients * (1000 // len(patients) + 1))[:1000]
+    durees = chronometrer(lambda: client.post("/predict/batch", json=lot), max(5, iterations // 50), 1)
+    resultat["/predict/batch (1000)"] = {"rows_per_second": round(1000 / float(np.median(durees)), 1),
+                                          **percentiles(durees)}
+    for code in ("logreg", "rf"):
+        resultat[f"/predict/{code}"] = percentiles(
+            chronometrer(lambda: client.post(f"/predict/{code}", json=patients[next(i) % len(patients)]),
+                         iterations))
+    return resultat
+
+
+def environnement():
+    import sklearn
+    return {
+        "date": datetime.now().isoformat(timespec="seconds"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpu_count": os.cpu_count(),
+        "numpy": np.__version__,
+        "pandas": pd.__version__,
+        "sklearn": sklearn.__version__,
+    }
+
+
+def comparer(rapport, reference):
+    """Affiche l'évolution des latences p50 par rapport à un rapport de référence"""
+    print(f"\n{'Mesure':<40}{'réf. (ms)':>12}{'actuel (ms)':>13}{'ratio':>8}")
+    lignes = []
+    for nom, r in rapport["models"].items():
+        ref = reference.get("models", {}).get(nom)
+        if ref:
+            lignes.append((f"{nom} single_row p50", ref["single_row"]["p50_ms"], r["single_row"]["p50_ms"]))
+            lignes.append((f"{nom} load p50", ref["load_p50_ms"], r["load_p50_ms"]))
+    for route, r in rapport.get("api", {}).items():
+        ref = reference.get("api", {}).get(route)
+        if isinstance(r, dict) and ref and "p50_ms" in r:
+            lignes.append((f"API {route} p50", ref["p50_ms"], r["p50_ms"]))
+    regressions = 0
+    for nom, ref, actuel in lignes:
+        ratio = actuel / ref if ref else float("nan")
+        alerte = "  ⚠️" if ratio > SEUIL_REGRESSION else ""
+        regressions += bool(alerte)
+        print(f"{nom:<40}{ref:>12.4f}{actuel:>13.4f}{ratio:>8.2f}{alerte}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark d'inférence des pipelines et de l'API")
+    parser.add_argument("--iterations", type=int, default=300, help="Requêtes unitaires par mesure")
+    parser.add_argument("--chargements", type=int, default=5, help="Chargements répétés par modèle")
+    parser.add_argument("--modeles", nargs="*", default=None, help="Codes à mesurer (défaut : tous)")
+    parser.add_argument("--sans-api", action="store_true", help="Ne pas mesurer l'API")
+    parser.add_argument("--sortie", default=None, help="Chemin du rapport JSON")
+    parser.add_argument("--comparer", default=None, help="Rapport JSON de référence")
+    args = parser.parse_args()
+    warnings.filterwarnings("ignore")
+
+    X = pd.read_csv("data/X_test.csv")[FEATURES]
+    chemins = {"optimise": OPTIMISED_MODEL_PATH}
+    chemins.update({code: chemin_pipeline(code) for code in (args.modeles or MODEL_NAME_MAP)
+                    if os.path.exists(chemin_pipeline(code))})
+
+    rapport = {"environment": environnement(), "models": {}}
+    for nom, chemin in chemins.items():
+        r = mesurer_modele(chemin, X, args.iterations, args.chargements)
+        rapport["models"][nom] = r
+        print(f"{nom:<10} chargement {r['load_p50_ms']:>8.2f} ms | "
+              f"unitaire p50 {r['single_row']['p50_ms']:.3f} / p99 {r['single_row']['p99_ms']:.3f} ms | "
+              f"lot 10000 : {r['batch_rows_per_second']['10000']:,.0f} lignes/s")
+    if not args.sans_api:
+        rapport["api"] = mesurer_api(X, args.iterations)
+        for route, r in rapport["api"].items():
+            if isinstance(r, dict):
+                print(f"API {route:<24} p50 {r['p50_ms']:.3f} ms | p99 {r['p99_ms']:.3f} ms")
+
+    sortie = args.sortie or os.path.join(RESULTATS_DIR, f"inference-{datetime.now():%Y%m%d-%H%M%S}.json")
+    os.makedirs(os.path.dirname(sortie) or ".", exist_ok=True)
+    with open(sortie, "w", encoding="utf-8") as f:
+        json.dump(rapport, f, indent=2)
+    print(f"\nRapport écrit dans {sortie}")
+
+    if args.comparer:
+        with open(args.comparer, encoding="utf-8") as f:
+            regressions = comparer(rapport, json.load(f))
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,66 @@
+# benchmarks/profil_import.py
+# Profil de démarrage à froid de l'application Streamlit basé sur `python -X importtime` :
+# temps d'import de toutes les pages (ancien app.py) comparé au seul import de la page
+# ouverte (chargement paresseux), avec les modules les plus coûteux de chaque scénario.
+#
+#   python benchmarks/profil_import.py [--repetitions 3] [--sortie benchmarks/profil_import.txt]
+
+import argparse
+import os
+import subprocess
+import sys
+
+RACINE = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+SCENARIOS = {
+    "avant : toutes les pages (import eager)": "streamlit, introduction, modelisation, visualisation, prediction",
+    "après : Introduction": "streamlit, introduction",
+    "après : Prédiction": "streamlit, prediction",
+    "après : Modélisation": "streamlit, modelisation",
+    "après : Visualisation": "streamlit, visualisation",
+}
+
+
+def profiler(modules):
+    """Temps d'import total (somme des temps propres, en s) et détail par module"""
+    resultat = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {modules}"],
+        cwd=RACINE, capture_output=True, text=True, check=True,
+    )
+    detail = []
+    for ligne in resultat.stderr.splitlines():
+        if not ligne.startswith("import time:") or "self [us]" in ligne:
+            continue
+        propre, cumul, nom = ligne[len("import time:"):].split("|")
+        detail.append((int(propre), int(cumul), nom.strip()))
+    return sum(d[0] for d in detail) / 1e6, detail
+
+
+def paquets_racines(detail, n=6):
+    """Paquets de premier niveau les plus coûteux (temps cumulé)"""
+    racines = [(cumul, nom) for _, cumul, nom in detail if "." not in nom]
+    return sorted(racines, reverse=True)[:n]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Profil d'import des pages Streamlit")
+    parser.add_argument("--repetitions", type=int, default=3)
+    parser.add_argument("--sortie", default=os.path.join("benchmarks", "profil_import.txt"))
+    args = parser.parse_args()
+
+    lignes = [f"Profil -X importtime (meilleur de {args.repetitions} exécutions, Python {sys.version.split()[0]})", ""]
+    reference = None
+    for scenario, modules in SCENARIOS.items():
+        mesures = [profiler(modules) for _ in range(args.repetitions)]
+        total, detail = min(mesures, key=lambda m: m[0])
+        reference = reference or total
+        lignes.append(f"{scenario:<42} {total:6.2f} s  ({total / reference:5.0%} de l'import eager)")
+        lignes.append("    " + ", ".join(f"{nom} {cumul / 1e6:.2f}s" for cumul, nom in paquets_racines(detail)))
+    rapport = "\n".join(lignes) + "\n"
+    print(rapport)
+    with open(os.path.join(RACINE, args.sortie), "w", encoding="utf-8") as f:
+        f.write(rapport)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+# cache_predictions.py
+# Mémoïsation des prédictions de l'API : clé = (identité du modèle, vecteur patient),
+# taille bornée (LRU), expiration (TTL) et invalidation quand le fichier du modèle change.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+
+def signature_fichier(chemin):
+    """Identité d'un fichier modèle : date de modification et taille"""
+    stat = os.stat(chemin)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+class CachePredictions:
+    """Cache LRU avec TTL des réponses de prédiction, sûr entre threads"""
+
+    def __init__(self, max_size=10000, ttl=300.0):
+        self.max_size = max_size
+        self.ttl = ttl
+        self._entrees = OrderedDict()  # (chemin, signature, features) -> (expiration, réponse)
+        self._signatures = {}          # chemin -> dernière signature observée
+        self._lock = threading.Lock()
+        self.hits = self.misses = self.evictions = self.expirations = self.invalidations = 0
+
+    def identite(self, chemin):
+        """Identité courante du modèle ; purge ses entrées si le fichier a changé"""
+        try:
+            signature = signature_fichier(chemin)
+        except OSError:
+            signature = None
+        with self._lock:
+            ancienne = self._signatures.get(chemin)
+            if ancienne is not None and ancienne != signature:
+                self._purger(chemin)
+            self._signatures[chemin] = signature
+        return (chemin, signature)
+
+    def _purger(self, chemin):
+        perimees = [cle for cle in self._entrees if cle[0] == chemin]
+        for cle in perimees:
+            del self._entrees[cle]
+        self.invalidations += len(perimees)
+
+    def purger(self, chemin):
+        """Supprime toutes les réponses mises en cache pour le modèle `chemin`"""
+        with self._lock:
+            self._purger(chemin)
+
+    def lire(self, identite, features):
+        cle = (*identite, features)
+        maintenant = time.monotonic()
+        with self._lock:
+            entree = self._entrees.get(cle)
+            if entree is not None:
+                if entree[0] > maintenant:
+                    self._entrees.move_to_end(cle)
+                    self.hits += 1
+                    return entree[1]
+                del self._entrees[cle]
+                self.expirations += 1
+            self.misses += 1
+            return None
+
+    def ecrire(self, identite, features, reponse):
+        cle = (*identite, features)
+        with self._lock:
+            self._entrees[cle] = (time.monotonic() + self.ttl, reponse)
+            self._entrees.move_to_end(cle)
+            while len(self._entrees) > self.max_size:
+                self._entrees.popitem(last=False)
+                self.evictions += 1
+
+    def vider(self):
+        with self._lock:
+            self._entrees.clear()
+
+    def statistiques(self):
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "size": len(self._entrees),
+                "max_size": self.max_size,
+                "ttl_seconds": self.ttl,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "evictions": self.evictions,
+                "expirations": self.expirations,
+                "invalidations": self.invalidations,
+            }
@@ -0,0 +1,51 @@
+# client_api.py
+# Client HTTP partagé par les pages Streamlit : connexions keep-alive réutilisées
+# (pool), timeouts, nouvelles tentatives avec backoff et prédictions par lot.
+
+import os
+
+import requests
+import streamlit as st
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+API_URL = os.environ.get("API_URL", "http://localhost:8000")
+
+
+class ClientAPI:
+    """Session requests avec pool de connexions vers l'API de prédiction"""
+
+    def __init__(self, base_url=API_URL, pool_size=16, timeout=(3.05, 30), retries=3, backoff=0.3):
+        self.base_url = base_url.rstrip("/")
+        self.timeout = timeout
+        self.pool_size = pool_size
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=(502, 503, 504),
+            # Les routes de prédiction sont idempotentes : un POST peut être rejoué
+            allowed_methods=frozenset({"GET", "POST"}),
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=pool_size, max_retries=retry)
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+
+    def get(self, chemin, **kwargs):
+        return self.session.get(self.base_url + chemin, timeout=self.timeout, **kwargs)
+
+    def post(self, chemin, json=None, **kwargs):
+        return self.session.post(self.base_url + chemin, json=json, timeout=self.timeout, **kwargs)
+
+    def predire_lot(self, patients):
+        """Prédictions d'une liste de patients en un seul appel à /predict/batch"""
+        response = self.post("/predict/batch", json=list(patients))
+        response.raise_for_status()
+        return response.json()["predictions"]
+
+
+@st.cache_resource
+def get_client():
+    """Client unique par processus Streamlit, partagé entre sessions et reruns"""
+    return ClientAPI()
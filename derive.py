@@ -0,0 +1,193 @@
+# derive.py
+# Surveillance de la dérive des entrées de l'API : chaque variable est résumée en
+# mémoire constante (histogramme à bords fixes tirés des quantiles de référence pour
+# les mesures, comptes par modalité pour les variables qualitatives), puis comparée
+# au profil de data/clean_heart_data.csv par PSI et KS. Sur le chemin de prédiction,
+# les vecteurs reçus sont seulement ajoutés à un tampon ; ils sont ventilés dans les
+# histogrammes par blocs vectorisés, hors de toute requête individuelle.
+# Le profil est construit dans le codage d'entraînement du modèle (voir codage_modele) :
+# un trafic tiré de la référence ne signale aucune dérive, un client qui code mal ses
+# entrées (cp en 0-3 par exemple) en signale une.
+
+import json
+import os
+import threading
+import time
+
+import numpy as np
+
+from registre import FEATURES
+
+CACHE_DIR = os.path.join(".cache", "derive")
+SOURCE_REFERENCE = "data/clean_heart_data.csv"
+
+CATEGORIELLES = ("ca", "sex", "cp", "fbs", "restecg")
+N_BINS = 20
+VERSION_PROFIL = 3  # à incrémenter quand la construction du profil change
+DECIMALES = 4  # arrondi commun à la référence et aux modalités observées
+EPSILON = 1e-4  # proportion plancher pour le PSI (log d'une classe vide)
+
+# Seuils usuels du PSI
+SEUILS_PSI = ((0.1, "stable"), (0.25, "moderee"), (float("inf"), "forte"))
+
+
+def codage_modele(data):
+    """Référence dans le codage d'entraînement du modèle, celui qu'attend l'API (cp 1-4) ;
+    les mesures float32 sont ramenées aux décimaux reçus en float64, pour qu'une valeur
+    égale à un bord de case tombe dans la même case que dans la référence.
+    """
+    return data[FEATURES].astype(np.float64).round(DECIMALES)
+
+
+def signature_source(source):
+    stat = os.stat(source)
+    return {"size": stat.st_size, "mtime_ns": stat.st_mtime_ns, "version": VERSION_PROFIL}
+
+
+def construire_profil(data, n_bins=N_BINS):
+    """Profil de référence : bords et proportions par variable"""
+    profil = {}
+    for f in FEATURES:
+        col = np.asarray(data[f], dtype=np.float64)
+        col = col[~np.isnan(col)]
+        if f in CATEGORIELLES:
+            valeurs, comptes = np.unique(col, return_counts=True)
+            # Dernière case : modalités absentes de la référence
+            profil[f] = {"type": "categorielle", "valeurs": valeurs.tolist(),
+                         "proportions": (np.append(comptes, 0) / len(col)).tolist()}
+        else:
+            bords = np.unique(np.quantile(col, np.linspace(0, 1, n_bins + 1)[1:-1]))
+            comptes = np.bincount(np.searchsorted(bords, col, side="right"), minlength=len(bords) + 1)
+            profil[f] = {"type": "continue", "bords": bords.tolist(),
+                         "proportions": (comptes / len(col)).tolist()}
+    return profil
+
+
+def profil_reference(source=SOURCE_REFERENCE, dossier=CACHE_DIR):
+    """Profil précalculé dans .cache/derive, reconstruit si le CSV de référence ou la
+    construction du profil ont changé"""
+    chemin = os.path.join(dossier, "reference.json")
+    signature = signature_source(source)
+    if os.path.exists(chemin):
+        with open(chemin, encoding="utf-8") as f:
+            contenu = json.load(f)
+        if contenu.get("signature") == signature:
+            return contenu["profil"]
+    import donnees
+    profil = construire_profil(codage_modele(donnees.charger("clean_heart_data")))
+    os.makedirs(dossier, exist_ok=True)
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump({"signature": signature, "profil": profil}, f)
+    os.replace(tmp, chemin)
+    return profil
+
+
+def psi(p_ref, p_obs):
+    p_ref = np.clip(p_ref, EPSILON, None)
+    p_obs = np.clip(p_obs, EPSILON, None)
+    return float(np.sum((p_obs - p_ref) * np.log(p_obs / p_ref)))
+
+
+def ks(p_ref, p_obs):
+    """Distance KS entre les fonctions de répartition évaluées aux bords des cases"""
+    return float(np.abs(np.cumsum(p_obs) - np.cumsum(p_ref)).max())
+
+
+def niveau(valeur_psi):
+    return next(nom for seuil, nom in SEUILS_PSI if valeur_psi < seuil)
+
+
+class MoniteurDerive:
+    """Histogrammes courants des entrées, sur une fenêtre glissante de 1 à 2 × `fenetre` patients"""
+
+    def __init__(self, profil, fenetre=10_000, taille_tampon=512, min_observations=100, rafraichir=10.0):
+        self.profil = profil
+        self.fenetre = fenetre
+        self.taille_tampon = taille_tampon
+        self.min_observations = min_observations
+        self.rafraichir = rafraichir
+        self._categorielle = [profil[f]["type"] == "categorielle" for f in FEATURES]
+        self._bords = [np.asarray(profil[f]["valeurs" if cat else "bords"])
+                       for f, cat in zip(FEATURES, self._categorielle)]
+        self._ref = [np.asarray(profil[f]["proportions"]) for f in FEATURES]
+        self._courant = self._vide()
+        self._precedent = self._vide()
+        self._n_courant = self._n_precedent = 0
+        self._tampon = []
+        self._lock = threading.Lock()
+        self._rapport = None
+        self._rapport_le = 0.0
+
+    def _vide(self):
+        return [np.zeros(len(p), dtype=np.int64) for p in self._ref]
+
+    def observer(self, X):
+        """Enregistre une ligne (tuple) ou une matrice (n, FEATURES) ; coût O(1) hors ventilation"""
+        with self._lock:
+            self._tampon.append(X)
+            plein = len(self._tampon) >= self.taille_tampon
+        if plein:
+            self._ventiler()
+
+    def _ventiler(self):
+        with self._lock:
+            tampon, self._tampon = self._tampon, []
+        if not tampon:
+            return
+        X = np.vstack([np.asarray(x, dtype=np.float64).reshape(-1, len(FEATURES)) for x in tampon])
+        comptes = []
+        for j, (bords, categorielle) in enumerate(zip(self._bords, self._categorielle)):
+            col = X[:, j]
+            if categorielle:
+                # Imputations non entières (ca) : comparées au même arrondi que la référence
+                col = col.round(DECIMALES)
+                pos = np.searchsorted(bords, col).clip(max=len(bords) - 1)
+                idx = np.where(bords[pos] == col, pos, len(bords))
+            else:
+                idx = np.searchsorted(bords, col, side="right")
+            comptes.append(np.bincount(idx, minlength=len(self._ref[j])))
+        with self._lock:
+            for total, c in zip(self._courant, comptes):
+                total += c
+            self._n_courant += len(X)
+            if self._n_courant >= self.fenetre:
+                # Fenêtre basculante : la plus ancienne moitié est oubliée
+                self._precedent, self._n_precedent = self._courant, self._n_courant
+                self._courant, self._n_courant = self._vide(), 0
+
+    def reinitialiser(self):
+        with self._lock:
+            self._tampon = []
+            self._courant, self._precedent = self._vide(), self._vide()
+            self._n_courant = self._n_precedent = 0
+            self._rapport = None
+
+    def rapport(self, force=False):
+        """PSI et KS par variable, recalculés au plus toutes les `rafraichir` secondes"""
+        if not force and self._rapport is not None and time.time() - self._rapport_le < self.rafraichir:
+            return self._rapport
+        self._ventiler()
+        with self._lock:
+            comptes = [a + b for a, b in zip(self._courant, self._precedent)]
+            n = self._n_courant + self._n_precedent
+        variables = {}
+        for f, ref, c in zip(FEATURES, self._ref, comptes):
+            entree = {"type": "categorielle" if f in CATEGORIELLES else "continue"}
+            if n >= self.min_observations:
+                obs = c / n
+                entree.update(psi=round(psi(ref, obs), 4), ks=round(ks(ref, obs), 4))
+                entree["niveau"] = niveau(entree["psi"])
+                if f in CATEGORIELLES:
+                    entree["hors_reference"] = round(float(obs[-1]), 4)
+            variables[f] = entree
+        rapport = {
+            "observations": int(n),
+            "fenetre": self.fenetre,
+            "suffisant": n >= self.min_observations,
+            "derive": sorted(f for f, v in variables.items() if v.get("niveau", "stable") != "stable"),
+            "variables": variables,
+            "calcule_le": time.time(),
+        }
+        self._rapport, self._rapport_le = rapport, rapport["calcule_le"]
+        return rapport
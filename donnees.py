@@ -0,0 +1,98 @@
+# donnees.py
+# Couche d'accès aux données partagée par toutes les pages : chaque CSV est converti
+# une seule fois en fichier Arrow (IPC, non compressé) aux types compacts, puis
+# relu par memory-mapping tant que le CSV source n'a pas changé. La signature du CSV
+# (taille, date en ns) est enregistrée dans les métadonnées du fichier Arrow : toute
+# différence, y compris la restauration d'un CSV plus ancien, déclenche une reconversion.
+
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pacsv
+
+CACHE_DIR = os.path.join(".cache", "donnees")
+
+# Codes des variables qualitatives : int8 suffit
+CODES = ("sex", "cp", "fbs", "restecg", "num")
+
+SOURCES = {
+    # nom -> (CSV source, séparateur, type des mesures)
+    "clean_heart_data": ("data/clean_heart_data.csv", ";", pa.float32()),
+    # Les données de test alimentent les modèles : mesures gardées en float64
+    # pour que les prédictions restent identiques à celles faites sur le CSV
+    "X_test": ("data/X_test.csv", ",", pa.float64()),
+    "y_test": ("data/y_test.csv", ",", pa.float64()),
+}
+
+
+def _schema(table, type_mesures):
+    champs = []
+    for champ in table.schema:
+        if champ.name in CODES:
+            champs.append(pa.field(champ.name, pa.int8()))
+        else:
+            champs.append(pa.field(champ.name, type_mesures))
+    return pa.schema(champs)
+
+
+def signature_source(chemin):
+    stat = os.stat(chemin)
+    return f"{stat.st_size}:{stat.st_mtime_ns}".encode()
+
+
+def chemin_arrow(nom, dossier=CACHE_DIR):
+    return os.path.join(dossier, f"{nom}.arrow")
+
+
+def convertir(nom, dossier=CACHE_DIR):
+    """Convertit le CSV source de `nom` en fichier Arrow typé ; retourne son chemin"""
+    csv, sep, type_mesures = SOURCES[nom]
+    # Signature lue avant la lecture : un CSV modifié pendant la conversion sera reconverti
+    signature = signature_source(csv)
+    table = pacsv.read_csv(csv, parse_options=pacsv.ParseOptions(delimiter=sep))
+    table = table.cast(_schema(table, type_mesures).with_metadata({b"source": signature}))
+    os.makedirs(dossier, exist_ok=True)
+    chemin = chemin_arrow(nom, dossier)
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    with pa.OSFile(tmp, "wb") as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, chemin)
+    return chemin
+
+
+def _lecteur(chemin):
+    return pa.ipc.open_file(pa.memory_map(chemin, "r"))
+
+
+def _signature_cache(lecteur):
+    return (lecteur.schema.metadata or {}).get(b"source")
+
+
+def a_jour(nom, dossier=CACHE_DIR):
+    """Vrai si le fichier Arrow a été converti depuis le CSV source dans son état actuel"""
+    chemin = chemin_arrow(nom, dossier)
+    if not os.path.exists(chemin):
+        return False
+    return _signature_cache(_lecteur(chemin)) == signature_source(SOURCES[nom][0])
+
+
+def charger_table(nom, dossier=CACHE_DIR):
+    """Table Arrow memory-mappée (convertie depuis le CSV au premier appel)"""
+    chemin = chemin_arrow(nom, dossier)
+    lecteur = _lecteur(chemin) if os.path.exists(chemin) else None
+    if lecteur is None or _signature_cache(lecteur) != signature_source(SOURCES[nom][0]):
+        lecteur = _lecteur(convertir(nom, dossier))
+    return lecteur.read_all()
+
+
+def charger(nom, dossier=CACHE_DIR):
+    """DataFrame pandas aux types compacts, en lecture seule
+
+    Les colonnes numériques sans valeur manquante sont des vues sur le fichier
+    memory-mappé (un bloc pandas par colonne, aucune copie) ; seules les colonnes avec
+    valeurs manquantes ou non numériques sont copiées. Modifier les données sur place
+    exige donc un .copy() préalable.
+    """
+    return charger_table(nom, dossier).to_pandas(split_blocks=True, self_destruct=True)
@@ -0,0 +1,15 @@
+# entrainement/
+# Ré-entraînement reproductible des pipelines servis (Pipeline/*.pkl et modèle
+# optimisé) à partir d'un fichier au format data/clean_heart_data.csv.
+#
+#   python -m entrainement                               # -> models/entrainement/
+#   python -m entrainement --publier                     # remplace les artefacts servis
+#   python -m entrainement nouvelles_donnees.parquet --modeles rf xgb --n-jobs 8
+#   python -m entrainement.incremental flux.parquet      # mise à jour incrémentale (SGD)
+
+from entrainement.modeles import CIBLE, ESPACES, construire_pipeline
+from entrainement.recherche import (charger_donnees, decouper, entrainer, entrainer_tous,
+                                    exporter_pipeline)
+
+__all__ = ["CIBLE", "ESPACES", "construire_pipeline", "charger_donnees", "decouper",
+           "entrainer", "entrainer_tous", "exporter_pipeline"]
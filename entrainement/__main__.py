@@ -0,0 +1,66 @@
+# entrainement/__main__.py
+# Point d'entrée : python -m entrainement [données] [--modeles ...] [--publier]
+# Les artefacts sont écrits sous models/entrainement/ ; seul --publier remplace ceux que
+# servent l'API et l'application (Pipeline/, modèle optimisé, data/X_test.csv, y_test.csv).
+
+import argparse
+import json
+import os
+import sys
+
+from entrainement.modeles import ESPACES
+from entrainement.recherche import CACHE_DIR, charger_donnees, entrainer_tous
+
+SORTIE_PAR_DEFAUT = os.path.join("models", "entrainement")
+RACINE_SERVIE = "."
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Ré-entraînement des pipelines avec recherche d'hyperparamètres")
+    parser.add_argument("donnees", nargs="?", default="data/clean_heart_data.csv",
+                        help="Fichier CSV ou Parquet au format clean_heart_data")
+    parser.add_argument("--sep", default=";", help="Séparateur du CSV d'entrée")
+    parser.add_argument("--modeles", nargs="+", choices=list(ESPACES), default=list(ESPACES),
+                        help="Modèles à ré-entraîner ('optimise' = logreg_model_optimise.joblib)")
+    parser.add_argument("--sortie", default=None,
+                        help=f"Racine où écrire Pipeline/, le modèle optimisé et data/ (défaut {SORTIE_PAR_DEFAUT})")
+    parser.add_argument("--publier", action="store_true",
+                        help="Remplacer les artefacts servis à la racine du dépôt (rechargés à chaud par l'API)")
+    parser.add_argument("--n-jobs", type=int, default=-1, help="Processus de validation croisée (-1 = tous les cœurs)")
+    parser.add_argument("--cv", type=int, default=5, help="Nombre de plis")
+    parser.add_argument("--melanger", action="store_true",
+                        help="Découpage train/test stratifié et mélangé au lieu du découpage ordonné du notebook")
+    args = parser.parse_args(argv)
+    if args.publier:
+        if args.sortie is not None:
+            parser.error("--publier écrit à la racine du dépôt : incompatible avec --sortie")
+        args.sortie = RACINE_SERVIE
+    elif args.sortie is None:
+        args.sortie = SORTIE_PAR_DEFAUT
+    elif os.path.realpath(args.sortie) == os.path.realpath(RACINE_SERVIE):
+        parser.error("--sortie ne peut pas être la racine des artefacts servis : utilisez --publier")
+
+    try:
+        X, y = charger_donnees(args.donnees, args.sep)
+    except (OSError, ValueError) as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+
+    def afficher(r):
+        print(f"  {r['code']:<9} {r['scoring']} CV={r['cv_score']:.3f}  test={r['test_accuracy']:.3f}  "
+              f"{r['candidates']} candidats / {r['iterations']} itérations  {r['seconds']} s  -> {r['path']}")
+
+    print(f"Entraînement sur {len(X):,} lignes ({args.donnees})")
+    rapports = entrainer_tous(X, y, args.modeles, args.sortie, args.n_jobs, args.cv, args.melanger,
+                              callback=afficher)
+
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    chemin_rapport = os.path.join(CACHE_DIR, "rapport.json")
+    with open(chemin_rapport, "w", encoding="utf-8") as f:
+        json.dump(rapports, f, indent=2, default=str)
+    print(f"✅ {len(rapports)} modèles écrits sous {args.sortie} (rapport : {chemin_rapport})")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+# entrainement/incremental.py
+# Apprentissage incrémental de la régression logistique servie : le fichier est lu par
+# blocs, la standardisation est mise à jour en une seule passe (moyenne et variance
+# courantes de StandardScaler.partial_fit) et un SGDClassifier à perte logistique est
+# ajusté bloc par bloc. Des instantanés sont écrits périodiquement sous forme de
+# pipeline StandardScaler + LogisticRegression dans models/incremental/ ; le modèle
+# servi n'est remplacé qu'avec --publier, après validation du dernier instantané sur
+# data/X_test.csv. L'API le recharge alors à chaud et le score avec son moteur NumPy
+# comme le modèle entraîné hors ligne.
+#
+#   python -m entrainement.incremental flux_patients.csv --chunksize 50000 --publier-tous 10
+#   python -m entrainement.incremental nouveaux.parquet --reprendre --publier
+
+import argparse
+import copy
+import os
+import sys
+import time
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression, SGDClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from entrainement.modeles import CIBLE, RANDOM_STATE
+from entrainement.recherche import CACHE_DIR, exporter_pipeline
+from registre import FEATURES, OPTIMISED_MODEL_PATH
+from score_csv import lire_par_blocs
+
+ETAT_PATH = os.path.join(CACHE_DIR, "incremental.joblib")
+INSTANTANE_PATH = os.path.join("models", "incremental", "logreg_incremental.joblib")
+
+
+class ApprentissageIncremental:
+    """Scaler et SGD logistique mis à jour bloc par bloc, sans garder les données"""
+
+    def __init__(self, classes=(0, 1), alpha=1e-4, random_state=RANDOM_STATE):
+        self.classes = np.asarray(classes)
+        self.scaler = StandardScaler()
+        self.clf = SGDClassifier(loss="log_loss", alpha=alpha, random_state=random_state)
+        self.n_vus = 0
+        self.n_blocs = 0
+
+    def mettre_a_jour(self, X, y):
+        """Ajuste sur un bloc ; retourne l'accuracy du modèle *avant* ce bloc (validation progressive)"""
+        X = np.asarray(X, dtype=np.float64)
+        y = np.asarray(y)
+        precision = None
+        if self.n_vus:
+            precision = float((self.clf.predict(self.scaler.transform(X)) == y).mean())
+        self.scaler.partial_fit(X)
+        self.clf.partial_fit(self.scaler.transform(X), y, classes=self.classes)
+        self.n_vus += len(X)
+        self.n_blocs += 1
+        return precision
+
+    def instantane(self):
+        """Pipeline StandardScaler + LogisticRegression figé, servable par l'API"""
+        scaler = copy.deepcopy(self.scaler)
+        logreg = LogisticRegression()
+        # SGD à perte logistique et LogisticRegression binaire partagent la même
+        # fonction de décision et le même predict_proba (sigmoïde)
+        logreg.coef_ = self.clf.coef_.copy()
+        logreg.intercept_ = self.clf.intercept_.copy()
+        logreg.classes_ = self.clf.classes_.copy()
+        logreg.n_iter_ = np.array([self.n_blocs])
+        # Comme un pipeline ajusté sur un DataFrame : seul le scaler connaît les noms
+        scaler.feature_names_in_ = np.asarray(FEATURES, dtype=object)
+        logreg.n_features_in_ = len(FEATURES)
+        return Pipeline([("scaler", scaler), ("classifier", logreg)])
+
+    def sauvegarder(self, chemin=ETAT_PATH):
+        os.makedirs(os.path.dirname(chemin), exist_ok=True)
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        joblib.dump(self, tmp)
+        os.replace(tmp, chemin)
+
+    @staticmethod
+    def charger(chemin=ETAT_PATH):
+        return joblib.load(chemin)
+
+
+def separer_bloc(bloc):
+    """Colonnes FEATURES et cible d'un bloc ; les lignes incomplètes sont ignorées"""
+    manquantes = [c for c in FEATURES + [CIBLE] if c not in bloc.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes : {manquantes}")
+    bloc = bloc[FEATURES + [CIBLE]].dropna()
+    return bloc[FEATURES].to_numpy(dtype=np.float64), bloc[CIBLE].to_numpy()
+
+
+def apprendre_flux(chemin, apprenant, sortie=INSTANTANE_PATH, chunksize=10_000, sep=";",
+                   publier_tous=1, callback=None):
+    """Parcourt le fichier une fois, publie un instantané tous les `publier_tous` blocs et à la fin"""
+    publies = 0
+    i = 0  # aucun bloc : fichier vide, possible avec --reprendre (apprenant.n_vus > 0)
+    for i, bloc in enumerate(lire_par_blocs(chemin, chunksize, sep), start=1):
+        X, y = separer_bloc(bloc)
+        if not len(X):
+            continue
+        debut = time.perf_counter()
+        precision = apprenant.mettre_a_jour(X, y)
+        publie = i % publier_tous == 0
+        if publie:
+            exporter_pipeline(apprenant.instantane(), sortie)
+            publies += 1
+        if callback is not None:
+            callback(i, len(X), precision, time.perf_counter() - debut, publie)
+    if apprenant.n_vus and (not publies or i % publier_tous):
+        exporter_pipeline(apprenant.instantane(), sortie)
+        publies += 1
+    return publies
+
+
+def publier(apprenant, cible, precision_min):
+    """Valide l'instantané courant sur le jeu de test puis le publie vers `cible` ; retourne son accuracy"""
+    import donnees
+    from rechargement import valider
+    pipeline = apprenant.instantane()
+    # Mêmes contrôles que le rechargement à chaud : un modèle refusé ne remplace pas le modèle servi
+    precision = valider(pipeline, donnees.charger("X_test")[FEATURES], donnees.charger("y_test"), precision_min)
+    exporter_pipeline(pipeline, cible)
+    return precision
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Mise à jour incrémentale de la régression logistique servie")
+    parser.add_argument("donnees", help="Fichier CSV ou Parquet au format clean_heart_data")
+    parser.add_argument("--sortie", default=INSTANTANE_PATH,
+                        help="Chemin des instantanés intermédiaires (jamais le modèle servi)")
+    parser.add_argument("--publier", action="store_true",
+                        help="Valider le dernier instantané sur data/X_test.csv puis remplacer le modèle servi")
+    parser.add_argument("--cible", default=os.environ.get("MODEL_PATH", OPTIMISED_MODEL_PATH),
+                        help="Modèle servi remplacé par --publier")
+    parser.add_argument("--precision-min", type=float, default=float(os.environ.get("MODEL_MIN_ACCURACY", 0.6)),
+                        help="Accuracy minimale sur le jeu de test pour publier")
+    parser.add_argument("--chunksize", type=int, default=10_000, help="Nombre de lignes par bloc")
+    parser.add_argument("--sep", default=";", help="Séparateur du CSV d'entrée")
+    parser.add_argument("--publier-tous", type=int, default=1, help="Publier un instantané tous les N blocs")
+    parser.add_argument("--alpha", type=float, default=None,
+                        help="Régularisation L2 du SGD (défaut 1e-4 ; appliquée aussi avec --reprendre)")
+    parser.add_argument("--reprendre", action="store_true",
+                        help=f"Reprendre l'apprentissage depuis l'état sauvegardé ({ETAT_PATH})")
+    args = parser.parse_args(argv)
+    if os.path.realpath(args.sortie) == os.path.realpath(args.cible):
+        parser.error("--sortie ne peut pas être le modèle servi : utilisez --publier")
+
+    if args.reprendre and os.path.exists(ETAT_PATH):
+        apprenant = ApprentissageIncremental.charger()
+        print(f"Reprise : {apprenant.n_vus:,} lignes déjà vues")
+        if args.alpha is not None and args.alpha != apprenant.clf.alpha:
+            print(f"alpha : {apprenant.clf.alpha:g} -> {args.alpha:g} pour les blocs suivants")
+            apprenant.clf.set_params(alpha=args.alpha)
+    else:
+        if args.reprendre:
+            print(f"Aucun état sauvegardé ({ETAT_PATH}) : apprentissage depuis zéro")
+        apprenant = ApprentissageIncremental(alpha=1e-4 if args.alpha is None else args.alpha)
+
+    def afficher(i, n, precision, duree, publie):
+        precision = "   -  " if precision is None else f"{precision:.3f}"
+        print(f"  bloc {i:>5}  {n:>8,} lignes  accuracy avant mise à jour {precision}  "
+              f"{duree * 1000:.1f} ms{'  -> publié' if publie else ''}", file=sys.stderr)
+
+    try:
+        publies = apprendre_flux(args.donnees, apprenant, args.sortie, args.chunksize, args.sep,
+                                 args.publier_tous, afficher)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    apprenant.sauvegarder()
+    print(f"✅ {apprenant.n_vus:,} lignes apprises, {publies} instantané(s) -> {args.sortie}")
+    if args.publier and apprenant.n_vus:
+        try:
+            precision = publier(apprenant, args.cible, args.precision_min)
+        except ValueError as e:
+            print(f"Publication refusée, modèle servi inchangé : {e}", file=sys.stderr)
+            return 1
+        print(f"✅ Publié -> {args.cible} (accuracy {precision:.3f} sur data/X_test.csv)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,82 @@
+# entrainement/modeles.py
+# Définition des pipelines et de leurs grilles d'hyperparamètres, reprises du
+# notebook Notebook/Modelisation.ipynb.
+
+from sklearn.linear_model import LogisticRegression
+from sklearn.naive_bayes import GaussianNB
+from sklearn.neighbors import KNeighborsClassifier
+from sklearn.neural_network import MLPClassifier
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+from sklearn.svm import SVC
+from sklearn.tree import DecisionTreeClassifier
+
+CIBLE = "num"
+RANDOM_STATE = 42
+
+
+def _xgboost():
+    # Import différé : xgboost n'est nécessaire que si le modèle est ré-entraîné.
+    # n_jobs=1 : le parallélisme est porté par la recherche, pas par chaque arbre
+    from xgboost import XGBClassifier
+    return XGBClassifier(eval_metric="logloss", n_jobs=1, random_state=RANDOM_STATE)
+
+
+# code -> (fabrique du classifieur, grille, métrique de validation croisée)
+ESPACES = {
+    "rf": (lambda: RandomForestClassifier(random_state=RANDOM_STATE), {
+        "classifier__n_estimators": [50, 100, 200],
+        "classifier__max_depth": [None, 10, 20],
+        "classifier__min_samples_split": [2, 5],
+        "classifier__min_samples_leaf": [1, 2],
+        "classifier__max_features": ["sqrt", "log2"],
+        "classifier__bootstrap": [True, False],
+    }, "accuracy"),
+    "xgb": (_xgboost, {
+        "classifier__n_estimators": [50, 100],
+        "classifier__max_depth": [3, 5],
+        "classifier__learning_rate": [0.1, 0.3],
+    }, "accuracy"),
+    "mlp": (lambda: MLPClassifier(random_state=RANDOM_STATE, max_iter=500), {
+        "classifier__hidden_layer_sizes": [(50,), (100,), (100, 50)],
+        "classifier__activation": ["relu", "tanh"],
+        "classifier__alpha": [0.0001, 0.001, 0.01],
+        "classifier__learning_rate_init": [0.001, 0.01],
+    }, "accuracy"),
+    "dt": (lambda: DecisionTreeClassifier(random_state=RANDOM_STATE), {
+        "classifier__max_depth": [3, 5, 10, 15, None],
+        "classifier__min_samples_split": [2, 5, 10],
+        "classifier__criterion": ["gini", "entropy"],
+    }, "accuracy"),
+    "svm": (lambda: SVC(kernel="linear", probability=True, random_state=RANDOM_STATE), {
+        "classifier__C": [0.01, 0.1, 1, 10, 100],
+        "classifier__kernel": ["linear", "rbf"],
+        "classifier__gamma": ["scale", "auto"],
+    }, "accuracy"),
+    "logreg": (lambda: LogisticRegression(solver="lbfgs", max_iter=1000, random_state=RANDOM_STATE), {
+        "classifier__C": [0.01, 0.1, 1, 10, 100],
+        "classifier__solver": ["lbfgs", "saga"],
+    }, "accuracy"),
+    "knn": (KNeighborsClassifier, {
+        "classifier__n_neighbors": [3, 5, 7, 9, 11],
+        "classifier__metric": ["euclidean", "manhattan"],
+    }, "accuracy"),
+    "nb": (GaussianNB, {
+        "classifier__var_smoothing": [1e-9, 1e-8, 1e-7, 1e-6, 1e-5],
+    }, "accuracy"),
+    # Modèle servi par défaut par l'API (logreg_model_optimise.joblib), optimisé sur le rappel
+    "optimise": (lambda: LogisticRegression(multi_class="multinomial", solver="lbfgs",
+                                            max_iter=1000, random_state=RANDOM_STATE), {
+        "classifier__C": [0.01, 0.1, 1, 10, 100],
+    }, "recall_weighted"),
+}
+
+
+def construire_pipeline(code, memory=None):
+    """Pipeline standardisation + classifieur de `code` ; `memory` met en cache le scaler ajusté"""
+    fabrique, _, _ = ESPACES[code]
+    return Pipeline([
+        ("scaler", StandardScaler()),
+        ("classifier", fabrique()),
+    ], memory=memory)
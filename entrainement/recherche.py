@@ -0,0 +1,115 @@
+# entrainement/recherche.py
+# Recherche d'hyperparamètres par successive halving : tous les candidats sont d'abord
+# évalués sur un petit échantillon, seul le meilleur tiers passe à l'itération suivante
+# avec trois fois plus de lignes. Les plis de validation croisée sont répartis sur
+# tous les cœurs, et le scaler ajusté est mis en cache sur disque (joblib.Memory)
+# pour ne pas être recalculé pour chaque candidat d'un même pli.
+
+import os
+import time
+
+import joblib
+import pandas as pd
+from sklearn.experimental import enable_halving_search_cv  # noqa: F401
+from sklearn.metrics import accuracy_score
+from sklearn.model_selection import HalvingGridSearchCV, StratifiedKFold, train_test_split
+
+from entrainement.modeles import CIBLE, ESPACES, RANDOM_STATE, construire_pipeline
+from registre import FEATURES, OPTIMISED_MODEL_PATH, PIPELINES_DIR, chemin_pipeline
+
+CACHE_DIR = os.path.join(".cache", "entrainement")
+
+
+def charger_donnees(chemin, sep=";"):
+    """Lit un fichier CSV ou Parquet au format clean_heart_data ; retourne X, y"""
+    if chemin.endswith(".parquet"):
+        data = pd.read_parquet(chemin)
+    else:
+        data = pd.read_csv(chemin, sep=sep)
+    manquantes = [c for c in FEATURES + [CIBLE] if c not in data.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes : {manquantes}")
+    return data[FEATURES], data[CIBLE]
+
+
+def decouper(X, y, test_size=0.2, melanger=False):
+    """Découpage train/test du notebook (80/20, sans mélange) ou stratifié si `melanger`"""
+    if melanger:
+        return train_test_split(X, y, test_size=test_size, random_state=RANDOM_STATE, stratify=y)
+    return train_test_split(X, y, test_size=test_size, random_state=RANDOM_STATE, shuffle=False)
+
+
+def entrainer(code, X_train, y_train, n_jobs=-1, cv=5, memory=None):
+    """Recherche successive halving sur la grille de `code` ; retourne le HalvingGridSearchCV ajusté"""
+    _, grille, scoring = ESPACES[code]
+    recherche = HalvingGridSearchCV(
+        construire_pipeline(code, memory=memory),
+        grille,
+        factor=3,
+        resource="n_samples",
+        min_resources="exhaust",
+        cv=StratifiedKFold(n_splits=cv, shuffle=True, random_state=RANDOM_STATE),
+        scoring=scoring,
+        n_jobs=n_jobs,
+        random_state=RANDOM_STATE,
+    )
+    recherche.fit(X_train, y_train)
+    return recherche
+
+
+def _ecrire_atomique(ecrire, chemin):
+    dossier = os.path.dirname(chemin)
+    if dossier:
+        os.makedirs(dossier, exist_ok=True)
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    ecrire(tmp)
+    # os.replace : le rechargement à chaud ne voit jamais un fichier à moitié écrit
+    os.replace(tmp, chemin)
+
+
+def exporter_pipeline(modele, chemin):
+    """Écrit le pipeline sans son cache d'entraînement, de façon atomique"""
+    modele.set_params(memory=None)
+    _ecrire_atomique(lambda tmp: joblib.dump(modele, tmp), chemin)
+    return chemin
+
+
+def chemin_sortie(code, sortie="."):
+    if code == "optimise":
+        return os.path.join(sortie, OPTIMISED_MODEL_PATH)
+    return chemin_pipeline(code, os.path.join(sortie, PIPELINES_DIR))
+
+
+def entrainer_tous(X, y, codes=None, sortie=".", n_jobs=-1, cv=5, melanger=False,
+                   cache_dir=CACHE_DIR, callback=None):
+    """Ré-entraîne les modèles `codes`, écrit pipelines et jeu de test ; retourne un rapport par modèle"""
+    codes = codes or list(ESPACES)
+    X_train, X_test, y_train, y_test = decouper(X, y, melanger=melanger)
+    memory = joblib.Memory(os.path.join(cache_dir, "transformations"), verbose=0)
+
+    rapports = []
+    for code in codes:
+        debut = time.perf_counter()
+        recherche = entrainer(code, X_train, y_train, n_jobs=n_jobs, cv=cv, memory=memory)
+        chemin = exporter_pipeline(recherche.best_estimator_, chemin_sortie(code, sortie))
+        rapport = {
+            "code": code,
+            "path": chemin,
+            "scoring": recherche.scoring,
+            "cv_score": round(float(recherche.best_score_), 4),
+            "test_accuracy": round(float(accuracy_score(y_test, recherche.predict(X_test))), 4),
+            "best_params": {k.removeprefix("classifier__"): v for k, v in recherche.best_params_.items()},
+            "candidates": int(recherche.n_candidates_[0]),
+            "iterations": int(recherche.n_iterations_),
+            "seconds": round(time.perf_counter() - debut, 2),
+        }
+        rapports.append(rapport)
+        if callback is not None:
+            callback(rapport)
+
+    # Jeu de test écrit comme dans le notebook : lu par modelisation.py et les évaluations
+    donnees = os.path.join(sortie, "data")
+    _ecrire_atomique(lambda tmp: X_test.to_csv(tmp, index=False), os.path.join(donnees, "X_test.csv"))
+    _ecrire_atomique(lambda tmp: y_test.to_csv(tmp, index=False), os.path.join(donnees, "y_test.csv"))
+    memory.clear(warn=False)
+    return rapports
@@ -0,0 +1,196 @@
+# evaluations.py
+# Stockage persistant des évaluations de modèles : les métriques d'un pipeline sont
+# calculées une seule fois par couple (hash du fichier modèle, hash des données de test)
+# puis relues depuis le disque.
+
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+from multiprocessing import get_context
+
+import numpy as np
+from threadpoolctl import threadpool_limits
+
+from artefacts import charger_modele
+from sklearn.metrics import (
+    accuracy_score, precision_score,
+    recall_score, f1_score, confusion_matrix,
+    classification_report
+)
+
+EVALUATIONS_DIR = os.path.join(".cache", "evaluations")
+TEST_FILES = ("data/X_test.csv", "data/y_test.csv")
+
+_hash_memo = {}
+
+
+def hash_fichier(chemin):
+    """SHA-256 du contenu d'un fichier, mémorisé tant que sa date et sa taille ne changent pas"""
+    stat = os.stat(chemin)
+    signature = (stat.st_mtime_ns, stat.st_size)
+    memo = _hash_memo.get(chemin)
+    if memo and memo[0] == signature:
+        return memo[1]
+    h = hashlib.sha256()
+    with open(chemin, "rb") as f:
+        for bloc in iter(lambda: f.read(1 << 20), b""):
+            h.update(bloc)
+    _hash_memo[chemin] = (signature, h.hexdigest())
+    return h.hexdigest()
+
+
+def calculer_metriques(model, X_test, y_test):
+    """Métriques d'un modèle sur le jeu de test, prédictions et probabilités incluses"""
+    y_pred = model.predict(X_test)
+    y_true = np.ravel(y_test)
+    proba = None
+    if hasattr(model, "predict_proba"):
+        # Probabilité de la classe positive (dernière classe)
+        proba = model.predict_proba(X_test)[:, -1]
+    return {
+        "accuracy": accuracy_score(y_test, y_pred),
+        "precision": precision_score(y_test, y_pred, average='weighted'),
+        "recall": recall_score(y_test, y_pred, average='weighted'),
+        "f1": f1_score(y_test, y_pred, average='weighted'),
+        "confusion_matrix": confusion_matrix(y_test, y_pred),
+        "report": classification_report(y_test, y_pred, output_dict=True),
+        "y_true": y_true,
+        "y_pred": np.asarray(y_pred),
+        "proba": proba,
+    }
+
+
+def _vers_json(metriques):
+    return {k: (v.tolist() if isinstance(v, np.ndarray) else v) for k, v in metriques.items()}
+
+
+def _depuis_json(artefact):
+    metriques = dict(artefact)
+    metriques["confusion_matrix"] = np.asarray(artefact["confusion_matrix"])
+    for cle in ("y_true", "y_pred", "proba"):
+        if artefact.get(cle) is not None:
+            metriques[cle] = np.asarray(artefact[cle])
+    return metriques
+
+
+class StoreEvaluations:
+    """Artefacts d'évaluation sur disque, indexés par hash du modèle et des données de test"""
+
+    def __init__(self, dossier=EVALUATIONS_DIR, fichiers_test=TEST_FILES):
+        self.dossier = dossier
+        self.fichiers_test = fichiers_test
+
+    def cle(self, model_path):
+        h = hashlib.sha256(hash_fichier(model_path).encode())
+        for chemin in self.fichiers_test:
+            h.update(hash_fichier(chemin).encode())
+        return h.hexdigest()[:32]
+
+    def _chemin(self, cle):
+        return os.path.join(self.dossier, f"{cle}.json")
+
+    def lire(self, model_path):
+        """Métriques déjà calculées pour ce modèle, ou None"""
+        chemin = self._chemin(self.cle(model_path))
+        if not os.path.exists(chemin):
+            return None
+        try:
+            with open(chemin, encoding="utf-8") as f:
+                return _depuis_json(json.load(f))
+        except (OSError, ValueError):
+            return None
+
+    def ecrire(self, model_path, metriques):
+        os.makedirs(self.dossier, exist_ok=True)
+        chemin = self._chemin(self.cle(model_path))
+        artefact = _vers_json(metriques)
+        artefact["model_path"] = model_path
+        # Écriture atomique : un lecteur concurrent ne voit jamais un fichier partiel
+        tmp = f"{chemin}.{os.getpid()}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(artefact, f)
+        os.replace(tmp, chemin)
+
+    def evaluer(self, model_path, X_test, y_test, model=None):
+        """Relit l'évaluation du modèle ou la calcule et la persiste"""
+        metriques = self.lire(model_path)
+        if metriques is not None:
+            return metriques
+        debut = time.perf_counter()
+        if model is None:
+            model = charger_modele(model_path)
+        metriques = calculer_metriques(model, X_test, y_test)
+        metriques["evaluation_seconds"] = time.perf_counter() - debut
+        self.ecrire(model_path, metriques)
+        return metriques
+
+
+# === ⚡ Évaluation parallèle ===
+THREAD_ENV_VARS = ("OMP_NUM_THREADS", "OPENBLAS_NUM_THREADS", "MKL_NUM_THREADS")
+
+
+def limiter_threads_modele(model):
+    """Force les estimateurs multi-threads (XGBoost, k-NN...) à un seul thread"""
+    if hasattr(model, "get_params"):
+        params = {k: 1 for k in model.get_params() if k == "n_jobs" or k.endswith("__n_jobs")}
+        if params:
+            model.set_params(**params)
+    return model
+
+
+def _initialiser_worker():
+    # Un thread BLAS/OpenMP par processus : le parallélisme vient du pool
+    for var in THREAD_ENV_VARS:
+        os.environ[var] = "1"
+    threadpool_limits(limits=1)
+
+
+def _evaluer_tache(model_path, X_test, y_test):
+    debut = time.perf_counter()
+    model = limiter_threads_modele(charger_modele(model_path))
+    metriques = calculer_metriques(model, X_test, y_test)
+    metriques["evaluation_seconds"] = time.perf_counter() - debut
+    return metriques, metriques["evaluation_seconds"]
+
+
+def evaluer_en_parallele(model_paths, X_test, y_test, store=None, max_workers=None, mode="thread"):
+    """Évalue les pipelines en parallèle et produit (chemin, métriques, durée, erreur)
+    au fil de l'eau, dans l'ordre de fin d'évaluation. La durée est celle de l'évaluation,
+    y compris pour une évaluation relue depuis le store (None si elle n'y a pas été
+    enregistrée)."""
+    store = store or StoreEvaluations()
+    a_calculer = []
+    for model_path in model_paths:
+        metriques = store.lire(model_path)
+        if metriques is not None:
+            yield model_path, metriques, metriques.get("evaluation_seconds"), None
+        else:
+            a_calculer.append(model_path)
+    if not a_calculer:
+        return
+
+    max_workers = min(max_workers or os.cpu_count() or 1, len(a_calculer))
+    if mode == "process":
+        executor = ProcessPoolExecutor(max_workers, mp_context=get_context("spawn"),
+                                       initializer=_initialiser_worker)
+    else:
+        executor = ThreadPoolExecutor(max_workers)
+    # En mode thread, la limite BLAS/OpenMP s'applique à tout le processus
+    limites = threadpool_limits(limits=1) if mode != "process" else None
+    try:
+        with executor:
+            futures = {executor.submit(_evaluer_tache, p, X_test, y_test): p for p in a_calculer}
+            for future in as_completed(futures):
+                model_path = futures[future]
+                try:
+                    metriques, duree = future.result()
+                except Exception as e:
+                    yield model_path, None, None, e
+                    continue
+                store.ecrire(model_path, metriques)
+                yield model_path, metriques, duree, None
+    finally:
+        if limites is not None:
+            limites.restore_original_limits()
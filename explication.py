@@ -0,0 +1,150 @@
+# explication.py
+# Contributions par variable de chaque prédiction, calculées par lot :
+#   - régression logistique : attribution linéaire exacte, coef × valeur standardisée
+#     (espace log-odds, somme + base = logit de la probabilité de la classe 1) ;
+#   - arbre de décision et forêt : attributions de chemin (Saabas). Le cumul des
+#     variations de probabilité le long du chemin est précalculé pour chaque feuille,
+#     un lot s'explique donc par apply(X) et une indexation dans cette table ;
+#   - XGBoost : mêmes attributions de chemin, calculées nativement par le booster
+#     (pred_contribs avec approx_contribs, espace log-odds).
+
+import weakref
+
+import numpy as np
+import pandas as pd
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.tree import DecisionTreeClassifier
+
+from inference import MoteurLineaire
+from registre import FEATURES
+
+
+def _separer(pipeline):
+    """(étapes de prétraitement, classifieur final)"""
+    if isinstance(pipeline, Pipeline):
+        return pipeline[:-1], pipeline.steps[-1][1]
+    return None, pipeline
+
+
+def _pretraiter(pretraitement, X):
+    if pretraitement is None:
+        return np.asarray(X)
+    noms = getattr(pretraitement, "feature_names_in_", None)
+    if noms is not None and not hasattr(X, "columns"):
+        X = pd.DataFrame(X, columns=noms)
+    return pretraitement.transform(X)
+
+
+class ExplicateurLineaire:
+    espace = "log-odds"
+
+    def __init__(self, pipeline):
+        self.moteur = MoteurLineaire.depuis_pipeline(pipeline)
+        coef = self.moteur.coef_t[:, -1]
+        intercept = self.moteur.intercept[-1]
+        # Softmax binaire : p1 = sigmoïde(2 × décision)
+        facteur = 2.0 if self.moteur.multinomial and self.moteur.coef_t.shape[1] == 1 else 1.0
+        self.coef = facteur * coef
+        self.base = float(facteur * intercept)
+
+    def contributions(self, X):
+        Z = (np.asarray(X, dtype=np.float64) - self.moteur.mean) / self.moteur.scale
+        return Z * self.coef, np.full(len(Z), self.base)
+
+
+class ExplicateurArbres:
+    espace = "probabilite"
+
+    def __init__(self, pipeline):
+        self.pretraitement, self.clf = _separer(pipeline)
+        arbres = self.clf.estimators_ if isinstance(self.clf, RandomForestClassifier) else [self.clf]
+        # Table nœud -> contributions cumulées depuis la racine ; seules les lignes des
+        # feuilles servent, un lot s'explique donc par apply() et une indexation par arbre
+        tables, decalages, bases = [], [], []
+        n_noeuds = 0
+        for arbre in arbres:
+            tables.append(self._table(arbre.tree_))
+            decalages.append(n_noeuds)
+            n_noeuds += arbre.tree_.node_count
+            bases.append(tables[-1][1])
+        self.table = np.vstack([t for t, _ in tables])
+        self.decalages = np.asarray(decalages)
+        # Forêt : predict_proba est la moyenne des arbres
+        self.n_arbres = len(arbres)
+        self.base = float(np.mean(bases))
+
+    @staticmethod
+    def _table(t):
+        valeurs = t.value[:, 0, :]
+        proba = valeurs[:, -1] / valeurs.sum(axis=1)
+        parent = np.full(t.node_count, -1)
+        for enfants in (t.children_left, t.children_right):
+            internes = np.flatnonzero(enfants >= 0)
+            parent[enfants[internes]] = internes
+        profondeur = np.zeros(t.node_count, dtype=np.intp)
+        for i in range(1, t.node_count):  # un parent a toujours un indice inférieur à ses enfants
+            profondeur[i] = profondeur[parent[i]] + 1
+        table = np.zeros((t.node_count, len(FEATURES)))
+        # Niveau par niveau : le nœud hérite du cumul de son parent, plus la variation
+        # de probabilité attribuée à la variable testée par ce parent
+        for d in range(1, profondeur.max() + 1):
+            noeuds = np.flatnonzero(profondeur == d)
+            table[noeuds] = table[parent[noeuds]]
+            table[noeuds, t.feature[parent[noeuds]]] += proba[noeuds] - proba[parent[noeuds]]
+        return table, proba[0]
+
+    def contributions(self, X):
+        Z = _pretraiter(self.pretraitement, X)
+        feuilles = self.clf.apply(np.asarray(Z, dtype=np.float32)).reshape(len(Z), -1)
+        contributions = np.zeros((len(Z), len(FEATURES)))
+        for j, decalage in enumerate(self.decalages):
+            contributions += self.table[decalage + feuilles[:, j]]
+        return contributions / self.n_arbres, np.full(len(Z), self.base)
+
+
+class ExplicateurXGBoost:
+    espace = "log-odds"
+
+    def __init__(self, pipeline):
+        self.pretraitement, self.clf = _separer(pipeline)
+        self.booster = self.clf.get_booster()
+
+    def contributions(self, X):
+        import xgboost
+        Z = _pretraiter(self.pretraitement, X)
+        # approx_contribs : attribution de chemin, ~30× plus rapide que TreeSHAP exact
+        contribs = self.booster.predict(xgboost.DMatrix(Z), pred_contribs=True, approx_contribs=True)
+        contribs = contribs.astype(np.float64)
+        return contribs[:, :-1], contribs[:, -1]
+
+
+def _type_explicateur(pipeline):
+    _, clf = _separer(pipeline)
+    if isinstance(clf, LogisticRegression):
+        return ExplicateurLineaire
+    if isinstance(clf, (DecisionTreeClassifier, RandomForestClassifier)):
+        return ExplicateurArbres
+    if type(clf).__name__ == "XGBClassifier":
+        return ExplicateurXGBoost
+    raise ValueError(f"Explication non disponible pour {type(clf).__name__}")
+
+
+# Un explicateur par pipeline chargé, libéré avec lui (éviction du registre, rechargement)
+_explicateurs = weakref.WeakKeyDictionary()
+
+
+def explicateur(pipeline):
+    """Explicateur du pipeline, construit au premier appel ; ValueError si le modèle n'est pas supporté"""
+    e = _explicateurs.get(pipeline)
+    if e is None:
+        e = _explicateurs[pipeline] = _type_explicateur(pipeline)(pipeline)
+    return e
+
+
+def expliquer(pipeline, X):
+    """Contributions (n, FEATURES), base (n,) et espace de l'attribution pour une matrice X"""
+    e = explicateur(pipeline)
+    contributions, base = e.contributions(X)
+    return contributions, base, e.espace
@@ -0,0 +1,119 @@
+# graphiques_agreges.py
+# Moteur de graphiques « agrégats d'abord » pour les gros volumes : les histogrammes,
+# quantiles, moyennes par groupe et effectifs sont calculés de façon vectorisée
+# (NumPy / groupby pandas), puis matplotlib ne dessine que ces agrégats.
+# Seules la densité (KDE) et les points atypiques utilisent un échantillon borné.
+
+import numpy as np
+import pandas as pd
+from scipy.stats import gaussian_kde
+
+ECHANTILLON_MAX = 5000   # points utilisés pour la KDE
+ATYPIQUES_MAX = 500      # points atypiques dessinés par boîte
+Z_95 = 1.959963984540054
+
+
+def echantillonner(valeurs, taille_max=ECHANTILLON_MAX, graine=0):
+    valeurs = np.asarray(valeurs)
+    if len(valeurs) <= taille_max:
+        return valeurs
+    return np.random.default_rng(graine).choice(valeurs, taille_max, replace=False)
+
+
+# === 🧮 Agrégats ===
+def agreger_histogramme(serie, bins=30, kde=True, taille_max=ECHANTILLON_MAX):
+    valeurs = pd.to_numeric(serie, errors="coerce").dropna().to_numpy(dtype=np.float64)
+    comptes, bords = np.histogram(valeurs, bins=bins)
+    agregat = {"comptes": comptes, "bords": bords, "kde": None}
+    if kde and len(valeurs) > 1 and np.ptp(valeurs) > 0:
+        grille = np.linspace(bords[0], bords[-1], 200)
+        densite = gaussian_kde(echantillonner(valeurs, taille_max))(grille)
+        # Mise à l'échelle des effectifs, comme seaborn
+        agregat["kde"] = (grille, densite * len(valeurs) * (bords[1] - bords[0]))
+    return agregat
+
+
+def agreger_boxplot(serie):
+    """Statistiques de boîte à moustaches (règle 1,5 × IQR) au format de Axes.bxp"""
+    valeurs = pd.to_numeric(serie, errors="coerce").dropna().to_numpy(dtype=np.float64)
+    q1, med, q3 = np.percentile(valeurs, [25, 50, 75])
+    bas, haut = q1 - 1.5 * (q3 - q1), q3 + 1.5 * (q3 - q1)
+    dedans = (valeurs >= bas) & (valeurs <= haut)
+    return {
+        "label": serie.name, "q1": q1, "med": med, "q3": q3,
+        "whislo": valeurs[dedans].min(), "whishi": valeurs[dedans].max(),
+        "fliers": echantillonner(valeurs[~dedans], ATYPIQUES_MAX),
+    }
+
+
+def agreger_boxplots_groupes(data, quant, qual):
+    """Une boîte par modalité : quartiles et moustaches calculés par groupby"""
+    groupes = data[[qual, quant]].dropna().groupby(qual, observed=True)[quant]
+    quartiles = groupes.quantile([0.25, 0.5, 0.75]).unstack()
+    quartiles.columns = ["q1", "med", "q3"]
+    iqr = quartiles["q3"] - quartiles["q1"]
+    bornes = pd.DataFrame({"bas": quartiles["q1"] - 1.5 * iqr, "haut": quartiles["q3"] + 1.5 * iqr})
+    lignes = data[[qual, quant]].dropna().join(bornes, on=qual)
+    dedans = lignes[(lignes[quant] >= lignes["bas"]) & (lignes[quant] <= lignes["haut"])]
+    moustaches = dedans.groupby(qual, observed=True)[quant].agg(["min", "max"])
+    atypiques = lignes[(lignes[quant] < lignes["bas"]) | (lignes[quant] > lignes["haut"])]
+    stats = []
+    for modalite, q in quartiles.iterrows():
+        fliers = atypiques.loc[atypiques[qual] == modalite, quant].to_numpy()
+        stats.append({
+            "label": str(modalite), "q1": q["q1"], "med": q["med"], "q3": q["q3"],
+            "whislo": moustaches.at[modalite, "min"] if modalite in moustaches.index else q["q1"],
+            "whishi": moustaches.at[modalite, "max"] if modalite in moustaches.index else q["q3"],
+            "fliers": echantillonner(fliers, ATYPIQUES_MAX),
+        })
+    return stats
+
+
+def agreger_moyennes(data, quant, qual):
+    """Moyenne par modalité et intervalle de confiance à 95 % analytique (pas de bootstrap)"""
+    agregat = data.groupby(qual, observed=True)[quant].agg(["mean", "std", "count"])
+    agregat["ic95"] = Z_95 * agregat["std"] / np.sqrt(agregat["count"])
+    return agregat
+
+
+def agreger_comptes(serie):
+    """Effectifs par modalité (ordre des catégories si la série est catégorielle)"""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        return serie.value_counts(sort=False)
+    return serie.value_counts().sort_index()
+
+
+# === 🖌️ Rendu ===
+def _palette(cmap, n):
+    import matplotlib
+    return matplotlib.colormaps[cmap](np.linspace(0.35, 0.9, max(n, 1)))
+
+
+def tracer_histogramme(ax, agregat, couleur="steelblue"):
+    bords = agregat["bords"]
+    ax.bar(bords[:-1], agregat["comptes"], width=np.diff(bords), align="edge",
+           color=couleur, alpha=0.6, edgecolor="white")
+    if agregat["kde"] is not None:
+        ax.plot(*agregat["kde"], color=couleur)
+    ax.set_ylabel("Count")
+
+
+def tracer_boxplot(ax, stats, vertical=True, couleurs=None):
+    stats = stats if isinstance(stats, list) else [stats]
+    boites = ax.bxp(stats, vert=vertical, patch_artist=True, showfliers=True)
+    for boite, couleur in zip(boites["boxes"], couleurs if couleurs is not None else ["skyblue"] * len(stats)):
+        boite.set_facecolor(couleur)
+
+
+def tracer_moyennes(ax, agregat, cmap="Blues"):
+    positions = np.arange(len(agregat))
+    ax.bar(positions, agregat["mean"], yerr=agregat["ic95"], capsize=4,
+           color=_palette(cmap, len(agregat)))
+    ax.set_xticks(positions, [str(m) for m in agregat.index])
+
+
+def tracer_comptes(ax, comptes, cmap="Blues"):
+    positions = np.arange(len(comptes))
+    ax.bar(positions, comptes.to_numpy(), color=_palette(cmap, len(comptes)))
+    ax.set_xticks(positions, [str(m) for m in comptes.index])
+    ax.set_ylabel("count")
@@ -0,0 +1,77 @@
+# inference.py
+# Moteur de scoring NumPy pour la régression logistique servie par l'API :
+# les paramètres appris (StandardScaler + LogisticRegression) sont extraits
+# une seule fois, puis chaque requête est scorée sans construire de DataFrame.
+
+import numpy as np
+from scipy.special import expit
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+
+class MoteurLineaire:
+    """Représentation compacte d'un pipeline StandardScaler + LogisticRegression"""
+
+    def __init__(self, mean, scale, coef, intercept, classes, multinomial):
+        self.mean = np.ascontiguousarray(mean, dtype=np.float64)
+        self.scale = np.ascontiguousarray(scale, dtype=np.float64)
+        self.coef_t = np.ascontiguousarray(np.asarray(coef, dtype=np.float64).T)
+        self.intercept = np.asarray(intercept, dtype=np.float64)
+        self.classes_ = np.asarray(classes)
+        self.multinomial = multinomial
+
+    @classmethod
+    def depuis_pipeline(cls, pipeline):
+        """Extrait les paramètres d'un pipeline entraîné (scaler optionnel)"""
+        steps = [step for _, step in pipeline.steps] if isinstance(pipeline, Pipeline) else [pipeline]
+        clf = steps[-1]
+        if not isinstance(clf, LogisticRegression):
+            raise ValueError(f"Modèle non supporté : {type(clf).__name__}")
+        if len(steps) == 1:
+            n = clf.coef_.shape[1]
+            mean, scale = np.zeros(n), np.ones(n)
+        elif len(steps) == 2 and isinstance(steps[0], StandardScaler):
+            scaler = steps[0]
+            n = clf.coef_.shape[1]
+            mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+            scale = scaler.scale_ if scaler.with_std else np.ones(n)
+        else:
+            raise ValueError("Seuls les pipelines StandardScaler + LogisticRegression sont supportés")
+
+        # Même règle que LogisticRegression.predict_proba pour choisir OvR ou softmax
+        ovr = clf.multi_class in ["ovr", "warn"] or (
+            clf.multi_class in ["auto", "deprecated"]
+            and (clf.classes_.size <= 2 or clf.solver == "liblinear")
+        )
+        return cls(mean, scale, clf.coef_, clf.intercept_, clf.classes_, multinomial=not ovr)
+
+    def decision_function(self, X):
+        Z = (np.asarray(X, dtype=np.float64) - self.mean) / self.scale
+        scores = Z @ self.coef_t + self.intercept
+        return scores.ravel() if scores.shape[1] == 1 else scores
+
+    def predict_proba(self, X):
+        """Probabilités par classe, dans l'ordre de classes_ (mêmes opérations que scikit-learn)"""
+        decision = self.decision_function(X)
+        if self.multinomial:
+            if decision.ndim == 1:
+                decision = np.c_[-decision, decision]
+            decision = decision - decision.max(axis=1).reshape((-1, 1))
+            probas = np.exp(decision)
+            probas /= probas.sum(axis=1).reshape((-1, 1))
+            return probas
+        probas = expit(decision)
+        if probas.ndim == 1:
+            return np.vstack([1 - probas, probas]).T
+        probas /= probas.sum(axis=1).reshape((probas.shape[0], -1))
+        return probas
+
+    def predict(self, X):
+        return self.classes_[self.predict_proba(X).argmax(axis=1)]
+
+    def verifier_parite(self, pipeline, X):
+        """Vérifie que le moteur reproduit exactement pipeline.predict_proba sur X"""
+        attendu = pipeline.predict_proba(X)
+        obtenu = self.predict_proba(np.asarray(X, dtype=np.float64))
+        return attendu.shape == obtenu.shape and np.array_equal(attendu, obtenu)
@@ -0,0 +1,57 @@
+# intervalles.py
+# Intervalles de confiance bootstrap des métriques de comparaison des modèles. Les
+# rééchantillonnages portent sur les prédictions déjà en cache (y_true, y_pred du store
+# d'évaluations) : une matrice d'indices (B, n) tirée d'un coup donne, par bincount,
+# une matrice de confusion par rééchantillon, dont on déduit accuracy et
+# précision / rappel / F1 pondérés (mêmes définitions que scikit-learn, average="weighted").
+
+import numpy as np
+
+METRIQUES = ("accuracy", "precision", "recall", "f1")
+TAILLE_BLOC = 2_000_000  # éléments de la matrice d'indices traités à la fois
+
+
+def confusions(y_true, y_pred, indices, classes):
+    """Matrices de confusion (B, K, K) des rééchantillonnages décrits par `indices` (B, n)"""
+    K = len(classes)
+    codes = np.searchsorted(classes, y_true) * K + np.searchsorted(classes, y_pred)
+    B = len(indices)
+    decalages = (np.arange(B) * K * K)[:, None]
+    return np.bincount((decalages + codes[indices]).ravel(), minlength=B * K * K).reshape(B, K, K)
+
+
+def metriques_confusions(conf):
+    """Accuracy et précision / rappel / F1 pondérés par le support, pour chaque matrice (B, K, K)"""
+    tp = np.diagonal(conf, axis1=1, axis2=2).astype(np.float64)
+    vrais = conf.sum(axis=2)     # support de chaque classe
+    predits = conf.sum(axis=1)
+    n = vrais.sum(axis=1)
+    poids = vrais / n[:, None]
+    # Classe jamais prédite ou absente : 0, comme zero_division="warn" de scikit-learn
+    with np.errstate(invalid="ignore", divide="ignore"):
+        precision = np.where(predits > 0, tp / predits, 0.0)
+        rappel = np.where(vrais > 0, tp / vrais, 0.0)
+        f1 = np.where(predits + vrais > 0, 2 * tp / (predits + vrais), 0.0)
+    return {
+        "accuracy": tp.sum(axis=1) / n,
+        "precision": (poids * precision).sum(axis=1),
+        "recall": (poids * rappel).sum(axis=1),
+        "f1": (poids * f1).sum(axis=1),
+    }
+
+
+def bootstrap(y_true, y_pred, n_resamples=2000, niveau=0.95, random_state=42):
+    """Intervalle percentile {métrique: (borne basse, borne haute)} sur `n_resamples` tirages"""
+    y_true, y_pred = np.ravel(y_true), np.ravel(y_pred)
+    classes = np.unique(np.concatenate([y_true, y_pred]))
+    n = len(y_true)
+    rng = np.random.default_rng(random_state)
+    tirages = {m: [] for m in METRIQUES}
+    par_bloc = max(1, TAILLE_BLOC // max(n, 1))
+    for debut in range(0, n_resamples, par_bloc):
+        indices = rng.integers(0, n, size=(min(par_bloc, n_resamples - debut), n))
+        for m, valeurs in metriques_confusions(confusions(y_true, y_pred, indices, classes)).items():
+            tirages[m].append(valeurs)
+    alpha = (1 - niveau) / 2 * 100
+    return {m: tuple(float(b) for b in np.percentile(np.concatenate(v), [alpha, 100 - alpha]))
+            for m, v in tirages.items()}
@@ -0,0 +1,396 @@
+# jobs.py
+# Travaux longs de l'API (scoring d'un gros fichier, ré-évaluation des pipelines)
+# exécutés hors du chemin /predict : la file est une table SQLite locale, un thread
+# répartiteur y prend les travaux en attente et les confie à un pool borné de
+# processus de priorité abaissée. Les workers écrivent leur progression dans la
+# même base ; le statut final est enregistré par le répartiteur.
+#
+# JOBS_MAX_WORKERS borne le nombre de travaux en cours pour tout le déploiement :
+# chaque worker API (serveur_production) a son répartiteur, mais la prise d'un
+# travail vérifie la borne dans la base partagée. Chaque répartiteur signe ses
+# travaux (pid, battement de cœur) ; ceux d'un répartiteur disparu sont remis en
+# attente par les autres, périodiquement.
+#
+# Les paramètres viennent de requêtes HTTP : le fichier d'entrée doit se trouver
+# dans un dossier autorisé (JOBS_INPUT_DIRS), le modèle est désigné par son code et
+# le fichier de résultats est toujours écrit dans JOBS_DIR.
+#
+#   python jobs.py            # répartiteur autonome, sans serveur API
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+JOBS_DIR = os.path.join(".cache", "jobs")
+DB_PATH = os.path.join(JOBS_DIR, "jobs.db")
+# Dossiers d'où les travaux peuvent lire un fichier à scorer
+DOSSIERS_ENTREE = os.environ.get("JOBS_INPUT_DIRS", os.pathsep.join(["data", os.path.join(JOBS_DIR, "uploads")]))
+FORMATS_SORTIE = {"csv": "text/csv", "parquet": "application/vnd.apache.parquet"}  # format -> type MIME
+
+BATTEMENT = 5      # secondes entre deux battements de cœur d'un répartiteur
+EXPIRATION = 30    # battement plus ancien : le répartiteur est considéré disparu
+
+EN_ATTENTE, EN_COURS, TERMINE, ECHEC = "queued", "running", "succeeded", "failed"
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    type TEXT NOT NULL,
+    params TEXT NOT NULL,
+    status TEXT NOT NULL,
+    progress TEXT,
+    result TEXT,
+    error TEXT,
+    owner INTEGER,
+    heartbeat REAL,
+    created_at REAL NOT NULL,
+    started_at REAL,
+    finished_at REAL
+);
+CREATE INDEX IF NOT EXISTS jobs_status ON jobs (status, created_at);
+"""
+
+
+def _processus_vivant(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+class FileJobs:
+    """File persistante : une connexion SQLite courte par opération, sûre entre threads et processus"""
+
+    def __init__(self, chemin=DB_PATH):
+        self.chemin = chemin
+        os.makedirs(os.path.dirname(chemin) or ".", exist_ok=True)
+        with self._connexion() as cx:
+            cx.execute("PRAGMA journal_mode=WAL")  # lectures (polling) sans bloquer les écritures
+            cx.executescript(SCHEMA)
+            # Base créée avant le battement de cœur
+            colonnes = {c["name"] for c in cx.execute("PRAGMA table_info(jobs)")}
+            if "heartbeat" not in colonnes:
+                cx.execute("ALTER TABLE jobs ADD COLUMN heartbeat REAL")
+
+    def _connexion(self):
+        cx = sqlite3.connect(self.chemin, timeout=30)
+        cx.row_factory = sqlite3.Row
+        return cx
+
+    @staticmethod
+    def _decrire(ligne):
+        job = dict(ligne)
+        for cle in ("params", "progress", "result"):
+            if job[cle] is not None:
+                job[cle] = json.loads(job[cle])
+        job.pop("owner")
+        job.pop("heartbeat")
+        return job
+
+    def soumettre(self, type_job, params):
+        job_id = uuid.uuid4().hex
+        with self._connexion() as cx:
+            cx.execute("INSERT INTO jobs (id, type, params, status, created_at) VALUES (?, ?, ?, ?, ?)",
+                       (job_id, type_job, json.dumps(params), EN_ATTENTE, time.time()))
+        return job_id
+
+    def obtenir(self, job_id):
+        with self._connexion() as cx:
+            ligne = cx.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._decrire(ligne) if ligne is not None else None
+
+    def lister(self, limite=50):
+        with self._connexion() as cx:
+            lignes = cx.execute("SELECT * FROM jobs ORDER BY created_at DESC LIMIT ?", (limite,)).fetchall()
+        return [self._decrire(ligne) for ligne in lignes]
+
+    def prendre(self, proprietaire, limite=None):
+        """Passe atomiquement le plus ancien travail en attente à l'état running ; None si la file
+        est vide ou si `limite` travaux sont déjà en cours, tous répartiteurs confondus"""
+        cx = self._connexion()
+        cx.isolation_level = None
+        try:
+            # Verrou d'écriture dès le début : comptage et prise forment une seule étape
+            cx.execute("BEGIN IMMEDIATE")
+            maintenant = time.time()
+            ligne = cx.execute(
+                "UPDATE jobs SET status = ?, owner = ?, heartbeat = ?, started_at = ? WHERE id = ("
+                "  SELECT id FROM jobs WHERE status = ? ORDER BY created_at LIMIT 1"
+                ") AND (? IS NULL OR (SELECT COUNT(*) FROM jobs WHERE status = ?) < ?) RETURNING id, type, params",
+                (EN_COURS, proprietaire, maintenant, maintenant, EN_ATTENTE, limite, EN_COURS, limite),
+            ).fetchone()
+            cx.execute("COMMIT")
+        finally:
+            cx.close()
+        if ligne is None:
+            return None
+        return ligne["id"], ligne["type"], json.loads(ligne["params"])
+
+    def battre(self, proprietaire):
+        """Battement de cœur des travaux en cours de `proprietaire`"""
+        with self._connexion() as cx:
+            cx.execute("UPDATE jobs SET heartbeat = ? WHERE status = ? AND owner = ?",
+                       (time.time(), EN_COURS, proprietaire))
+
+    def progresser(self, job_id, progression):
+        with self._connexion() as cx:
+            cx.execute("UPDATE jobs SET progress = ? WHERE id = ?", (json.dumps(progression), job_id))
+
+    def terminer(self, job_id, resultat):
+        with self._connexion() as cx:
+            cx.execute("UPDATE jobs SET status = ?, result = ?, finished_at = ? WHERE id = ?",
+                       (TERMINE, json.dumps(resultat, default=str), time.time(), job_id))
+
+    def echouer(self, job_id, erreur):
+        with self._connexion() as cx:
+            cx.execute("UPDATE jobs SET status = ?, error = ?, finished_at = ? WHERE id = ?",
+                       (ECHEC, erreur, time.time(), job_id))
+
+    def reprendre_orphelins(self, expiration=EXPIRATION):
+        """Remet en attente les travaux dont le répartiteur a disparu (arrêt brutal, worker
+        remplacé) : processus absent, ou battement de cœur plus vieux que `expiration`"""
+        limite = time.time() - expiration
+        with self._connexion() as cx:
+            lignes = cx.execute("SELECT id, owner, heartbeat FROM jobs WHERE status = ?", (EN_COURS,)).fetchall()
+            orphelins = [
+                l for l in lignes
+                if l["owner"] is None or (l["heartbeat"] or 0) < limite or not _processus_vivant(l["owner"])
+            ]
+            # Conditionnel au propriétaire observé : un travail repris entre-temps n'est pas touché
+            cx.executemany(
+                "UPDATE jobs SET status = ?, owner = NULL, heartbeat = NULL, started_at = NULL "
+                "WHERE id = ? AND status = ? AND owner IS ?",
+                [(EN_ATTENTE, l["id"], EN_COURS, l["owner"]) for l in orphelins],
+            )
+        return [l["id"] for l in orphelins]
+
+
+# === ⚙️ Exécution dans les processus du pool ===
+def _initialiser_worker(nice):
+    from evaluations import _initialiser_worker as limiter_threads
+    limiter_threads()
+    # Priorité abaissée : les workers API gardent le CPU pour /predict
+    if nice and hasattr(os, "nice"):
+        os.nice(nice)
+
+
+def chemin_resultat(job_id, format_sortie="csv"):
+    return os.path.join(JOBS_DIR, f"{job_id}.{format_sortie}")
+
+
+def resoudre_entree(chemin):
+    """Chemin réel du fichier d'entrée ; ValueError s'il est hors des dossiers autorisés"""
+    reel = os.path.realpath(chemin)
+    for dossier in filter(None, DOSSIERS_ENTREE.split(os.pathsep)):
+        if reel.startswith(os.path.realpath(dossier) + os.sep):
+            return reel
+    raise ValueError(f"Fichier hors des dossiers autorisés ({DOSSIERS_ENTREE}) : {chemin}")
+
+
+def _score_file(job_id, params, file):
+    from score_csv import resoudre_modele, scorer_fichier
+    # Revalidé dans le worker : la base peut contenir des travaux soumis par une version antérieure
+    valider("score_file", params)
+    entree = resoudre_entree(params["input"])
+    sortie = chemin_resultat(job_id, params.get("format", "csv"))
+    total = None
+    if entree.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        total = pq.ParquetFile(entree).metadata.num_rows
+    dernier = [0.0]
+
+    def progression(n_lignes, duree):
+        # Au plus deux écritures par seconde dans la base
+        if time.monotonic() - dernier[0] >= 0.5:
+            dernier[0] = time.monotonic()
+            file.progresser(job_id, {"rows": n_lignes, "total": total,
+                                     "fraction": round(n_lignes / total, 4) if total else None})
+
+    rapport = scorer_fichier(entree, sortie, resoudre_modele(params.get("model", "optimise")),
+                             int(params.get("chunksize", 100_000)), params.get("sep", ","), progression)
+    file.progresser(job_id, {"rows": rapport["rows"], "total": rapport["rows"], "fraction": 1.0})
+    return {**rapport, "output": sortie}
+
+
+def _evaluate_all(job_id, params, file):
+    import donnees
+    from evaluations import StoreEvaluations, evaluer_en_parallele
+    from registre import FEATURES, MODEL_NAME_MAP, chemin_pipeline
+
+    codes = params.get("models") or list(MODEL_NAME_MAP)
+    chemins = {chemin_pipeline(code): code for code in codes}
+    X_test = donnees.charger("X_test")[FEATURES]
+    y_test = donnees.charger("y_test")
+    resultats = {}
+    # Un modèle à la fois : le parallélisme est celui du pool de travaux
+    for chemin, metriques, duree, erreur in evaluer_en_parallele(list(chemins), X_test, y_test,
+                                                                 StoreEvaluations(), max_workers=1):
+        code = chemins[chemin]
+        if erreur is not None:
+            resultats[code] = {"error": str(erreur)}
+        else:
+            resultats[code] = {k: round(float(metriques[k]), 4) for k in ("accuracy", "precision", "recall", "f1")}
+            resultats[code]["seconds"] = None if duree is None else round(duree, 3)
+        file.progresser(job_id, {"done": len(resultats), "total": len(chemins),
+                                 "fraction": round(len(resultats) / len(chemins), 4)})
+    return {"models": resultats}
+
+
+EXECUTEURS = {"score_file": _score_file, "evaluate_all": _evaluate_all}
+
+
+def executer_job(job_id, type_job, params, chemin_db):
+    return EXECUTEURS[type_job](job_id, params, FileJobs(chemin_db))
+
+
+def valider(type_job, params):
+    """Lève ValueError si la demande ne peut pas être exécutée"""
+    if type_job not in EXECUTEURS:
+        raise ValueError(f"Type inconnu : {type_job} (attendu : {list(EXECUTEURS)})")
+    if type_job == "score_file":
+        from registre import MODEL_NAME_MAP
+        inconnus = set(params) - {"input", "model", "format", "chunksize", "sep"}
+        if inconnus:
+            raise ValueError(f"Paramètres inconnus : {sorted(inconnus)}")
+        if not isinstance(params.get("input"), str) or not params["input"]:
+            raise ValueError("Paramètre 'input' requis")
+        entree = resoudre_entree(params["input"])
+        if not os.path.isfile(entree):
+            raise ValueError(f"Fichier introuvable : {params['input']}")
+        # Jamais un chemin : un fichier modèle est un pickle exécuté au chargement
+        if params.get("model", "optimise") not in ["optimise", *MODEL_NAME_MAP]:
+            raise ValueError(f"Modèle inconnu : {params['model']} "
+                             f"(attendu : 'optimise' ou {list(MODEL_NAME_MAP)})")
+        if params.get("format", "csv") not in FORMATS_SORTIE:
+            raise ValueError(f"Format inconnu : {params['format']} (attendu : {list(FORMATS_SORTIE)})")
+    if type_job == "evaluate_all":
+        from registre import MODEL_NAME_MAP
+        inconnus = [m for m in params.get("models") or [] if m not in MODEL_NAME_MAP]
+        if inconnus:
+            raise ValueError(f"Modèles inconnus : {inconnus}")
+
+
+# === 🚦 Répartiteur ===
+class RepartiteurJobs:
+    """Confie les travaux en attente à au plus `max_workers` processus"""
+
+    def __init__(self, file, max_workers=1, intervalle=0.5, nice=10):
+        if max_workers < 0:
+            raise ValueError(f"JOBS_MAX_WORKERS doit être positif ou nul (reçu : {max_workers})")
+        self.file = file
+        # Borne du déploiement : la prise d'un travail la vérifie dans la base partagée
+        self.max_workers = max_workers
+        self.intervalle = intervalle
+        self.nice = nice
+        self._dernier_battement = 0.0
+        self._en_cours = set()
+        self._lock = threading.Lock()
+        self._lock_pool = threading.Lock()
+        self._arret = threading.Event()
+        self._reveil = threading.Event()
+        self._pool = None
+        self._thread = None
+
+    def _nouveau_pool(self):
+        # spawn : pas de fork d'un processus serveur multi-thread
+        return ProcessPoolExecutor(self.max_workers, mp_context=get_context("spawn"),
+                                   initializer=_initialiser_worker, initargs=(self.nice,))
+
+    def demarrer(self):
+        orphelins = self.file.reprendre_orphelins()
+        if orphelins:
+            print(f"♻️ {len(orphelins)} travail(aux) orphelin(s) remis en attente")
+        self._pool = self._nouveau_pool()
+        self._thread = threading.Thread(target=self._boucle, name="repartiteur-jobs", daemon=True)
+        self._thread.start()
+
+    def reveiller(self):
+        """Prise en compte immédiate d'un travail soumis"""
+        self._reveil.set()
+
+    def _entretenir(self):
+        """Battement de cœur de nos travaux et reprise de ceux des répartiteurs disparus"""
+        if time.monotonic() - self._dernier_battement < BATTEMENT:
+            return
+        self._dernier_battement = time.monotonic()
+        self.file.battre(os.getpid())
+        orphelins = self.file.reprendre_orphelins()
+        if orphelins:
+            print(f"♻️ {len(orphelins)} travail(aux) orphelin(s) remis en attente")
+
+    def _boucle(self):
+        while not self._arret.is_set():
+            try:
+                self._entretenir()
+            except sqlite3.Error as e:
+                print(f"Entretien de la file impossible : {e}")
+            while len(self._en_cours) < self.max_workers and not self._arret.is_set():
+                job = self.file.prendre(os.getpid(), self.max_workers)
+                if job is None:
+                    break
+                job_id, type_job, params = job
+                with self._lock_pool:
+                    pool = self._pool
+                try:
+                    future = pool.submit(executer_job, job_id, type_job, params, self.file.chemin)
+                except Exception as e:
+                    self.file.echouer(job_id, f"{type(e).__name__}: {e}")
+                    continue
+                with self._lock:
+                    self._en_cours.add(job_id)
+                future.add_done_callback(lambda f, job_id=job_id, pool=pool: self._fin(job_id, f, pool))
+            self._reveil.wait(self.intervalle)
+            self._reveil.clear()
+
+    def _fin(self, job_id, future, pool):
+        try:
+            self.file.terminer(job_id, future.result())
+        except Exception as e:
+            self.file.echouer(job_id, f"{type(e).__name__}: {e}")
+            if type(e).__name__ == "BrokenProcessPool" and not self._arret.is_set():
+                # Un worker a été tué : les travaux suivants repartent sur un pool neuf. Tous
+                # les travaux du pool cassé échouent ensemble ; seul le premier le remplace.
+                with self._lock_pool:
+                    if self._pool is pool:
+                        self._pool = self._nouveau_pool()
+                        pool.shutdown(wait=False)
+        finally:
+            with self._lock:
+                self._en_cours.discard(job_id)
+            self._reveil.set()
+
+    def arreter(self):
+        self._arret.set()
+        self._reveil.set()
+        if self._pool is not None:
+            # Les travaux interrompus restent « running » et seront repris au prochain démarrage
+            self._pool.shutdown(wait=False, cancel_futures=True)
+
+
+def main():
+    max_workers = int(os.environ.get("JOBS_MAX_WORKERS", 1))
+    if max_workers < 1:
+        print(f"Erreur : JOBS_MAX_WORKERS={max_workers}, aucun travail ne pourrait s'exécuter", file=sys.stderr)
+        return 1
+    repartiteur = RepartiteurJobs(FileJobs(), max_workers=max_workers)
+    repartiteur.demarrer()
+    print(f"🚦 Répartiteur de travaux démarré ({repartiteur.max_workers} processus, base {DB_PATH})")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        repartiteur.arreter()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
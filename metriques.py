@@ -0,0 +1,289 @@
+# metriques.py
+# Instrumentation de l'API au format texte Prometheus : compteurs, jauges et
+# histogrammes en mémoire, middleware ASGI de latence par route et chronomètres
+# par étape du chemin de prédiction. Le rendu texte n'est calculé qu'au scraping.
+#
+# Multi-processus (serveur_production) : si METRICS_MULTIPROC_DIR est défini, chaque
+# worker y dépose périodiquement un instantané de ses métriques (<pid>.json) et le
+# scraping, reçu par n'importe quel worker, agrège tous les fichiers : compteurs et
+# histogrammes sommés (workers disparus compris, les totaux restent monotones),
+# jauges des workers vivants étiquetées par `worker`. Les autres workers sont vus
+# avec au plus INTERVALLE_EXPORT secondes de retard.
+
+import contextvars
+import glob
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+
+BUCKETS_LATENCE = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+INTERVALLE_EXPORT = 5.0  # secondes entre deux instantanés d'un worker
+
+# Instant d'arrivée de la requête courante, posé par le middleware
+debut_requete = contextvars.ContextVar("debut_requete", default=None)
+
+
+def _format_labels(noms, valeurs):
+    if not noms:
+        return ""
+    paires = ",".join(f'{n}="{str(v)}"' for n, v in zip(noms, valeurs))
+    return "{" + paires + "}"
+
+
+class Compteur:
+    type_prometheus = "counter"
+
+    def __init__(self, nom, aide, labels=()):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        self._valeurs = {}
+        self._lock = threading.Lock()
+
+    def inc(self, valeur=1.0, *labels):
+        with self._lock:
+            self._valeurs[labels] = self._valeurs.get(labels, 0.0) + valeur
+
+    def lignes(self):
+        with self._lock:
+            valeurs = dict(self._valeurs)
+        return [f"{self.nom}{_format_labels(self.labels, k)} {v}" for k, v in valeurs.items()]
+
+    def exporter(self):
+        with self._lock:
+            valeurs = [[[str(l) for l in k], v] for k, v in self._valeurs.items()]
+        return {"nom": self.nom, "aide": self.aide, "type": self.type_prometheus,
+                "labels": list(self.labels), "valeurs": valeurs}
+
+
+class Jauge(Compteur):
+    type_prometheus = "gauge"
+
+    def set(self, valeur, *labels):
+        with self._lock:
+            self._valeurs[labels] = float(valeur)
+
+    def dec(self, valeur=1.0, *labels):
+        self.inc(-valeur, *labels)
+
+
+class Histogramme:
+    type_prometheus = "histogram"
+
+    def __init__(self, nom, aide, labels=(), buckets=BUCKETS_LATENCE):
+        self.nom, self.aide, self.labels = nom, aide, tuple(labels)
+        self.buckets = tuple(buckets)
+        self._series = {}  # labels -> [compte par bucket (+Inf inclus), somme]
+        self._lock = threading.Lock()
+
+    def observe(self, valeur, *labels):
+        i = bisect_left(self.buckets, valeur)
+        with self._lock:
+            serie = self._series.get(labels)
+            if serie is None:
+                serie = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0][i] += 1
+            serie[1] += valeur
+
+    def lignes(self):
+        with self._lock:
+            series = {k: (list(v[0]), v[1]) for k, v in self._series.items()}
+        lignes = []
+        for labels, (comptes, somme) in series.items():
+            cumul = 0
+            for borne, compte in zip(self.buckets + (float("inf"),), comptes):
+                cumul += compte
+                le = "+Inf" if borne == float("inf") else repr(borne)
+                lignes.append(f"{self.nom}_bucket{_format_labels(self.labels + ('le',), labels + (le,))} {cumul}")
+            lignes.append(f"{self.nom}_sum{_format_labels(self.labels, labels)} {somme}")
+            lignes.append(f"{self.nom}_count{_format_labels(self.labels, labels)} {cumul}")
+        return lignes
+
+    def exporter(self):
+        with self._lock:
+            series = [[[str(l) for l in k], list(v[0]), v[1]] for k, v in self._series.items()]
+        return {"nom": self.nom, "aide": self.aide, "type": self.type_prometheus,
+                "labels": list(self.labels), "buckets": list(self.buckets), "series": series}
+
+    def ajouter(self, labels, comptes, somme):
+        """Cumule une série exportée par un autre processus"""
+        with self._lock:
+            serie = self._series.get(labels)
+            if serie is None:
+                serie = self._series[labels] = [[0] * (len(self.buckets) + 1), 0.0]
+            serie[0] = [a + b for a, b in zip(serie[0], comptes)]
+            serie[1] += somme
+
+
+class Registre:
+    """Ensemble des métriques exposées, plus des collecteurs évalués au scraping"""
+
+    def __init__(self):
+        self._metriques = []
+        self._collecteurs = {}
+
+    def ajouter(self, metrique):
+        self._metriques.append(metrique)
+        return metrique
+
+    def collecteur(self, fonction):
+        """`fonction()` renvoie des métriques fraîches à chaque scraping ; un collecteur
+        réenregistré (rechargement de module) remplace le précédent"""
+        self._collecteurs[(fonction.__module__, fonction.__qualname__)] = fonction
+        return fonction
+
+    def _toutes(self):
+        metriques = list(self._metriques)
+        for collecteur in list(self._collecteurs.values()):
+            metriques.extend(collecteur())
+        return metriques
+
+    def rendre(self):
+        """Texte Prometheus : métriques du processus, ou de tous les workers en multi-processus"""
+        dossier = dossier_multiprocessus()
+        if dossier:
+            self.exporter(dossier)
+            return _rendre(agreger(dossier))
+        return _rendre(self._toutes())
+
+    def exporter(self, dossier):
+        """Instantané des métriques de ce processus dans <dossier>/<pid>.json (écriture atomique)"""
+        contenu = {"pid": os.getpid(), "metriques": [m.exporter() for m in self._toutes()]}
+        chemin = os.path.join(dossier, f"{os.getpid()}.json")
+        tmp = f"{chemin}.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(contenu, f)
+        os.replace(tmp, chemin)
+
+    def exporter_periodiquement(self, intervalle=INTERVALLE_EXPORT):
+        """Thread d'export des instantanés (sans effet hors multi-processus) ; renvoie l'événement d'arrêt"""
+        arret = threading.Event()
+        dossier = dossier_multiprocessus()
+        if not dossier:
+            return arret
+
+        def boucle():
+            while True:
+                try:
+                    self.exporter(dossier)
+                except Exception as e:
+                    print(f"Export des métriques impossible : {e}")
+                if arret.wait(intervalle):
+                    return
+
+        threading.Thread(target=boucle, name="export-metriques", daemon=True).start()
+        return arret
+
+
+def dossier_multiprocessus():
+    return os.environ.get("METRICS_MULTIPROC_DIR") or None
+
+
+def _processus_vivant(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def agreger(dossier):
+    """Métriques de tous les instantanés du dossier, fusionnées par nom"""
+    fusion = {}
+    for chemin in sorted(glob.glob(os.path.join(dossier, "*.json"))):
+        try:
+            with open(chemin, encoding="utf-8") as f:
+                contenu = json.load(f)
+        except (OSError, ValueError):
+            continue
+        pid = contenu["pid"]
+        vivant = _processus_vivant(pid)
+        for m in contenu["metriques"]:
+            if m["type"] == "gauge":
+                # Valeur instantanée : seulement les workers vivants, un par série
+                if not vivant:
+                    continue
+                cible = fusion.setdefault(m["nom"], Jauge(m["nom"], m["aide"], m["labels"] + ["worker"]))
+                for labels, valeur in m["valeurs"]:
+                    cible.set(valeur, *labels, str(pid))
+            elif m["type"] == "counter":
+                cible = fusion.setdefault(m["nom"], Compteur(m["nom"], m["aide"], m["labels"]))
+                for labels, valeur in m["valeurs"]:
+                    cible.inc(valeur, *labels)
+            else:
+                cible = fusion.setdefault(m["nom"], Histogramme(m["nom"], m["aide"], m["labels"], m["buckets"]))
+                for labels, comptes, somme in m["series"]:
+                    cible.ajouter(tuple(labels), comptes, somme)
+    return list(fusion.values())
+
+
+def _rendre(metriques):
+    blocs = []
+    for m in metriques:
+        blocs.append(f"# HELP {m.nom} {m.aide}")
+        blocs.append(f"# TYPE {m.nom} {m.type_prometheus}")
+        blocs.extend(m.lignes())
+    return "\n".join(blocs) + "\n"
+
+
+registre = Registre()
+latence_requetes = registre.ajouter(Histogramme(
+    "api_request_duration_seconds", "Durée des requêtes HTTP par route", ("method", "route", "status")))
+requetes_en_cours = registre.ajouter(Jauge(
+    "api_requests_in_flight", "Requêtes HTTP en cours de traitement"))
+duree_etapes = registre.ajouter(Histogramme(
+    "api_prediction_stage_seconds", "Durée des étapes du chemin de prédiction", ("route", "stage")))
+chargement_modeles = registre.ajouter(Jauge(
+    "api_model_load_seconds", "Durée du dernier chargement de chaque modèle", ("model",)))
+
+
+@contextmanager
+def etape(route, nom):
+    """Chronomètre une étape du chemin de prédiction"""
+    debut = time.perf_counter()
+    try:
+        yield
+    finally:
+        duree_etapes.observe(time.perf_counter() - debut, route, nom)
+
+
+def mesurer_validation(route):
+    """Temps écoulé entre l'arrivée de la requête et l'entrée dans le handler
+    (routage, lecture du corps et validation pydantic)"""
+    debut = debut_requete.get()
+    if debut is not None:
+        duree_etapes.observe(time.perf_counter() - debut, route, "validation")
+
+
+class MiddlewareMetriques:
+    """Middleware ASGI : latence par route (gabarit de chemin) et requêtes en cours"""
+
+    def __init__(self, app, exclure=("/metrics",)):
+        self.app = app
+        self.exclure = set(exclure)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["path"] in self.exclure:
+            await self.app(scope, receive, send)
+            return
+        debut = time.perf_counter()
+        jeton = debut_requete.set(debut)
+        statut = [500]
+
+        async def send_avec_statut(message):
+            if message["type"] == "http.response.start":
+                statut[0] = message["status"]
+            await send(message)
+
+        requetes_en_cours.inc()
+        try:
+            await self.app(scope, receive, send_avec_statut)
+        finally:
+            requetes_en_cours.dec()
+            debut_requete.reset(jeton)
+            route = scope.get("route")
+            chemin = getattr(route, "path", None) or "non_routee"
+            latence_requetes.observe(time.perf_counter() - debut, scope["method"], chemin, statut[0])
@@ -1,34 +1,23 @@
 import os
-import joblib
+import time
 import pandas as pd
 import streamlit as st
 import matplotlib.pyplot as plt
 import seaborn as sns
-from sklearn.metrics import (
-    accuracy_score, precision_score, 
-    recall_score, f1_score, confusion_matrix,
-    classification_report
-)
-
-# Configuration
-PIPELINES_DIR = "Pipeline"
-MODEL_NAME_MAP = {
-    "rf": "Random Forest",
-    "xgb": "XGBoost",
-    "mlp": "MLP",
-    "dt": "Decision Tree",
-    "svm": "SVM",
-    "logreg": "Logistic Regression",
-    "knn": "k-NN",
-    "nb": "Naive Bayes"
-}
+
+from artefacts import charger_modele
+from donnees import charger
+from evaluations import StoreEvaluations, calculer_metriques, evaluer_en_parallele
+from registre import PIPELINES_DIR, MODEL_NAME_MAP
+import intervalles
+import seuils
 
 @st.cache_data
 def load_test_data():
     """Charge les données de test"""
     try:
-        X_test = pd.read_csv('data/X_test.csv')
-        y_test = pd.read_csv('data/y_test.csv')
+        X_test = charger("X_test")
+        y_test = charger("y_test")
         return X_test, y_test
     except Exception as e:
         st.error(f"Erreur chargement données: {str(e)}")
@@ -38,27 +27,45 @@ def load_test_data():
 def load_model(model_path):
     """Charge un modèle avec cache"""
     try:
-        return joblib.load(model_path)
+        return charger_modele(model_path)
     except Exception as e:
         st.error(f"Erreur chargement modèle: {str(e)}")
         return None
 
+@st.cache_resource
+def get_evaluation_store():
+    """Store des évaluations persistées sur disque"""
+    return StoreEvaluations()
+
+@st.cache_data(show_spinner=False)
+def bootstrap_evaluation(cle, _y_true, _y_pred):
+    """Intervalles bootstrap d'une évaluation, mémorisés par clé du store (modèle et jeu de test)"""
+    return intervalles.bootstrap(_y_true, _y_pred)
+
 def evaluate_model(model, X_test, y_test):
     """Évalue un modèle et retourne les métriques"""
     try:
-        y_pred = model.predict(X_test)
-        return {
-            "accuracy": accuracy_score(y_test, y_pred),
-            "precision": precision_score(y_test, y_pred, average='weighted'),
-            "recall": recall_score(y_test, y_pred, average='weighted'),
-            "f1": f1_score(y_test, y_pred, average='weighted'),
-            "confusion_matrix": confusion_matrix(y_test, y_pred),
-            "report": classification_report(y_test, y_pred, output_dict=True)
-        }
+        return calculer_metriques(model, X_test, y_test)
     except Exception as e:
         st.error(f"Erreur évaluation: {str(e)}")
         return None
 
+def evaluate_pipeline(model_path, X_test, y_test):
+    """Métriques d'un pipeline : relues depuis le store, calculées au premier passage seulement"""
+    store = get_evaluation_store()
+    metrics = store.lire(model_path)
+    if metrics is not None:
+        return metrics
+    debut = time.perf_counter()
+    model = load_model(model_path)
+    if model is None:
+        return None
+    metrics = evaluate_model(model, X_test, y_test)
+    if metrics:
+        metrics["evaluation_seconds"] = time.perf_counter() - debut
+        store.ecrire(model_path, metrics)
+    return metrics
+
 def show_model_metrics(metrics):
     """Affiche les métriques d'un modèle"""
     if not metrics:
@@ -78,6 +85,58 @@ def show_model_metrics(metrics):
     sns.heatmap(metrics['confusion_matrix'], annot=True, fmt='d', cmap='Blues', ax=ax)
     st.pyplot(fig)
 
+def show_threshold_analysis(metrics):
+    """Courbes ROC / précision-rappel et métriques au seuil choisi, depuis les probabilités en cache"""
+    if not metrics or metrics.get("proba") is None:
+        return
+    y, proba = seuils.depuis_metriques(metrics)
+    fpr, tpr, _ = seuils.courbe_roc(y, proba)
+    precision, rappel, _ = seuils.courbe_pr(y, proba)
+
+    st.subheader("📉 Courbes ROC et précision-rappel")
+    fig, (ax_roc, ax_pr) = plt.subplots(1, 2, figsize=(10, 4))
+    ax_roc.plot(fpr, tpr, label=f"AUC = {seuils.aire(fpr, tpr):.3f}")
+    ax_roc.plot([0, 1], [0, 1], linestyle="--", color="grey")
+    ax_roc.set_xlabel("Taux de faux positifs")
+    ax_roc.set_ylabel("Taux de vrais positifs (rappel)")
+    ax_roc.legend(loc="lower right")
+    ax_pr.step(rappel, precision, where="post", label=f"AP = {seuils.precision_moyenne(y, proba):.3f}")
+    ax_pr.set_xlabel("Rappel")
+    ax_pr.set_ylabel("Précision")
+    ax_pr.legend(loc="lower left")
+    st.pyplot(fig)
+    plt.close(fig)
+
+    st.subheader("🎚️ Seuil de décision")
+    tableau = seuils.balayage(y, proba)
+    seuil = st.slider("Probabilité minimale pour prédire un risque", 0.0, 1.0, 0.5, 0.01)
+    ligne = seuils.a_seuil(tableau, seuil)
+    cols = st.columns(4)
+    cols[0].metric("Rappel", f"{ligne['rappel']:.2%}")
+    cols[1].metric("Précision", "-" if pd.isna(ligne['precision']) else f"{ligne['precision']:.2%}")
+    cols[2].metric("Spécificité", f"{ligne['specificite']:.2%}")
+    cols[3].metric("F1-Score", f"{ligne['f1']:.2%}")
+    st.caption("Métriques calculées sur les patients qui servent aussi à choisir le seuil : "
+               "elles surestiment la performance attendue sur de nouveaux patients.")
+    depistage = seuils.choisir_seuil(tableau, rappel_min=0.9)
+    if depistage is None:
+        st.caption("Dépistage : aucun seuil n'atteint un rappel de 90 % sur ce jeu de test.")
+        return
+    # Estimation hors échantillon de la procédure exportée par seuils.py (Platt + seuil)
+    cv = seuils.validation_croisee(y, proba, rappel_min=0.9)
+    estimation = "" if cv is None else (
+        f" En validation croisée ({cv['n_plis']} plis), la même procédure donne un rappel de "
+        f"{cv['rappel']:.0%} et une précision de {cv['precision']:.0%} sur des patients non vus."
+    )
+    st.caption(f"Dépistage : le seuil {depistage['seuil']:.3f} atteint un rappel de {depistage['rappel']:.0%} "
+               f"avec une précision de {depistage['precision']:.0%} sur ce jeu de test.{estimation} "
+               "`python seuils.py --rappel-min 0.9` exporte ce seuil et une calibration appliqués par l'API.")
+
+COLONNES_IC = ("Accuracy IC 95 %", "Precision IC 95 %", "Recall IC 95 %", "F1 IC 95 %")
+
+def format_intervalle(ic):
+    return f"[{ic[0]:.1%} – {ic[1]:.1%}]"
+
 def page_modelisation():
     """Page principale de modélisation"""
     st.title("🔍 Analyse des Modèles")
@@ -97,41 +156,59 @@ def page_modelisation():
         st.warning("Aucun modèle trouvé!")
         return
 
-    # Évaluation des modèles
+    # Évaluation des modèles, en parallèle : chaque ligne s'affiche dès que son modèle est évalué
+    st.subheader("📈 Comparaison des modèles")
+    table = st.empty()
     performances = []
-    for file in model_files:
-        model_name = MODEL_NAME_MAP.get(file.split('_')[1].split('.')[0], "Inconnu")
-        model_path = os.path.join(PIPELINES_DIR, file)
-        
-        model = load_model(model_path)
-        if model is None:
+    model_paths = [os.path.join(PIPELINES_DIR, file) for file in model_files]
+    for model_path, metrics, duration, error in evaluer_en_parallele(
+        model_paths, X_test, y_test, store=get_evaluation_store()
+    ):
+        if error is not None:
+            st.error(f"Erreur évaluation {os.path.basename(model_path)}: {str(error)}")
             continue
-            
-        metrics = evaluate_model(model, X_test, y_test)
-        if metrics:
-            performances.append({
-                "Modèle": model_name,
-                "Accuracy": metrics['accuracy'],
-                "F1-Score": metrics['f1'],
-                "path": model_path
-            })
+        code = os.path.basename(model_path).split('_')[1].split('.')[0]
+        # Intervalles bootstrap à 95 % sur les prédictions en cache (y_true, y_pred)
+        ic = bootstrap_evaluation(get_evaluation_store().cle(model_path), metrics['y_true'], metrics['y_pred'])
+        performances.append({
+            "Modèle": MODEL_NAME_MAP.get(code, "Inconnu"),
+            "Accuracy": metrics['accuracy'],
+            "Accuracy IC 95 %": ic['accuracy'],
+            "Precision": metrics['precision'],
+            "Precision IC 95 %": ic['precision'],
+            "Recall": metrics['recall'],
+            "Recall IC 95 %": ic['recall'],
+            "F1-Score": metrics['f1'],
+            "F1 IC 95 %": ic['f1'],
+            "ROC-AUC": seuils.roc_auc(*seuils.depuis_metriques(metrics)) if metrics.get("proba") is not None else None,
+            # Durée de l'évaluation, même quand elle est relue depuis le store
+            "Temps d'évaluation (s)": duration,
+            "path": model_path
+        })
+        perf_df = pd.DataFrame(performances).sort_values("F1-Score", ascending=False)
+        table.dataframe(
+            perf_df.style.format({
+                "Accuracy": "{:.2%}",
+                "Precision": "{:.2%}",
+                "Recall": "{:.2%}",
+                "F1-Score": "{:.2%}",
+                **{col: format_intervalle for col in COLONNES_IC},
+                "ROC-AUC": "{:.3f}",
+                "Temps d'évaluation (s)": "{:.3f}"
+            }, na_rep="—"),
+            use_container_width=True
+        )
+
+    st.caption(
+        f"IC 95 % : intervalles bootstrap percentile (2000 rééchantillonnages des {len(y_test)} patients "
+        "de test). Des intervalles qui se chevauchent ne permettent pas de départager les modèles."
+    )
 
     # Affichage des résultats
     if not performances:
         st.error("Aucune performance calculée")
         return
 
-    perf_df = pd.DataFrame(performances).sort_values("F1-Score", ascending=False)
-    
-    st.subheader("📈 Comparaison des modèles")
-    st.dataframe(
-        perf_df.style.format({
-            "Accuracy": "{:.2%}",
-            "F1-Score": "{:.2%}"
-        }),
-        use_container_width=True
-    )
-
     # Analyse détaillée
     selected_model = st.selectbox(
         "Sélectionnez un modèle",
@@ -139,9 +216,9 @@ def page_modelisation():
     )
     
     selected_path = perf_df[perf_df["Modèle"] == selected_model]["path"].iloc[0]
-    model = load_model(selected_path)
-    metrics = evaluate_model(model, X_test, y_test)
+    metrics = evaluate_pipeline(selected_path, X_test, y_test)
     show_model_metrics(metrics)
+    show_threshold_analysis(metrics)
 
 # Pour tester indépendamment
 if __name__ == "__main__":
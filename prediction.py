@@ -1,24 +1,212 @@
+import hashlib
+import io
+
 import streamlit as st
-import requests
+
+from client_api import get_client
+from registre import FEATURES
+
+# Dictionnaires de correspondance
+sex_map = {"Femme": 0, "Homme": 1}
+# cp dans le codage d'entraînement du modèle (1-4, comme data/*.csv)
+cp_map = {
+    "Angine typique": 1,
+    "Angine atypique": 2,
+    "Douleur non-angineuse": 3,
+    "Asymptomatique": 4
+}
+fbs_map = {"≤ 120 mg/dl": 0, "> 120 mg/dl": 1}
+restecg_map = {
+    "Normal": 0,
+    "Anomalie onde ST-T": 1,
+    "Hypertrophie ventriculaire gauche": 2
+}
+
+# Modalités acceptées dans les fichiers : libellé du formulaire ou code numérique
+CODE_MAPS = {"sex": sex_map, "cp": cp_map, "fbs": fbs_map, "restecg": restecg_map}
+# Codage numérique de cp dans les fichiers : celui du modèle et de data/*.csv (1-4),
+# ou un codage 0-3 remonté d'un cran avant l'envoi à l'API
+CODAGES_CP = {"Modèle (1-4)": 0, "Décalé (0-3)": 1}
+ENTIERS = ("age",)  # entiers attendus par l'API hors variables codées (ca accepte les imputations)
+TAILLE_BLOC = 500
+
+
+def _lignes(masque):
+    return (masque[masque].index[:5] + 2).tolist()  # +2 : en-tête et numérotation à 1
+
+
+def detecter_codage_cp(df):
+    """Codage numérique de cp le plus probable d'un fichier (ambigu si seules 1-3 apparaissent)"""
+    import pandas as pd
+    if "cp" not in df.columns:
+        return "Modèle (1-4)"
+    codes = pd.to_numeric(df["cp"], errors="coerce")
+    if (codes == 0).any() and not (codes == 4).any():
+        return "Décalé (0-3)"
+    return "Modèle (1-4)"
+
+
+def colonnes_non_entieres(df):
+    """{colonne: premières lignes} des valeurs non entières de `ENTIERS`"""
+    import pandas as pd
+    resultat = {}
+    for col in ENTIERS:
+        if col in df.columns:
+            valeurs = pd.to_numeric(df[col], errors="coerce")
+            masque = valeurs.notna() & (valeurs != valeurs.round())
+            if masque.any():
+                resultat[col] = _lignes(masque)
+    return resultat
+
+
+def preparer_lot(df, codage_cp="Modèle (1-4)", arrondir=False):
+    """Valide un fichier de patients et convertit les libellés en codes ;
+    retourne (DataFrame prêt pour l'API, liste d'erreurs)
+
+    Les codes numériques de cp sont ramenés au codage du modèle (1-4) selon `codage_cp`.
+    Les valeurs non entières de age sont refusées, sauf si `arrondir` est vrai.
+    """
+    import pandas as pd  # import différé : seul le mode fichier en a besoin
+    manquantes = [f for f in FEATURES if f not in df.columns]
+    if manquantes:
+        return None, [f"Colonnes manquantes : {', '.join(manquantes)}"]
+    X = df[FEATURES].copy()
+    erreurs = []
+    for col, mapping in CODE_MAPS.items():
+        valeurs = X[col]
+        codes = pd.to_numeric(valeurs, errors="coerce")
+        if col == "cp":
+            codes = codes + CODAGES_CP[codage_cp]
+        if valeurs.dtype == object:
+            # Libellés du formulaire (ex. « Homme ») ou codes écrits en texte
+            codes = valeurs.map(mapping).fillna(codes)
+        invalides = ~codes.isin(list(mapping.values()))
+        if invalides.any():
+            attendus = [v - (CODAGES_CP[codage_cp] if col == "cp" else 0) for v in mapping.values()]
+            erreurs.append(f"Valeurs invalides pour '{col}' (lignes {_lignes(invalides)}) ; "
+                           f"attendu : {list(mapping)} ou {attendus}")
+        X[col] = codes
+    for col in FEATURES:
+        if col in CODE_MAPS:
+            continue
+        X[col] = pd.to_numeric(X[col], errors="coerce")
+        if X[col].isna().any():
+            erreurs.append(f"Valeurs manquantes ou non numériques pour '{col}' (lignes {_lignes(X[col].isna())})")
+    if not arrondir:
+        for col, lignes in colonnes_non_entieres(X).items():
+            erreurs.append(f"Valeurs non entières pour '{col}' (lignes {lignes}) ; l'API attend des entiers")
+    if erreurs:
+        return None, erreurs
+    entiers = [*ENTIERS, *CODE_MAPS]
+    X[entiers] = X[entiers].round().astype(int)
+    return X, []
+
+
+def scorer_lot(X, barre):
+    """Score le lot par blocs via /predict/batch en mettant à jour la barre de progression"""
+    import pandas as pd
+    client = get_client()
+    predictions = []
+    for debut in range(0, len(X), TAILLE_BLOC):
+        bloc = X.iloc[debut:debut + TAILLE_BLOC]
+        predictions.extend(client.predire_lot(bloc.to_dict("records")))
+        fin = min(debut + TAILLE_BLOC, len(X))
+        barre.progress(fin / len(X), text=f"{fin} / {len(X)} patients scorés")
+    return pd.DataFrame(predictions, index=X.index)
+
+
+def page_prediction_fichier():
+    import pandas as pd
+    st.markdown(
+        f"Importez un fichier CSV contenant les colonnes `{', '.join(FEATURES)}`. "
+        "Les variables qualitatives acceptent le code ou le libellé du formulaire."
+    )
+    fichier = st.file_uploader("📁 Fichier de patients", type=["csv"])
+    if fichier is None:
+        return
+    contenu = fichier.getvalue()
+    premiere_ligne = contenu.split(b"\n", 1)[0]
+    sep = ";" if premiere_ligne.count(b";") > premiere_ligne.count(b",") else ","
+    try:
+        df = pd.read_csv(io.BytesIO(contenu), sep=sep)
+    except Exception as e:
+        st.error(f"❌ Fichier illisible : {e}")
+        return
+    # Options toujours visibles : les modifier après un scoring relance la préparation
+    codages = list(CODAGES_CP)
+    codage_cp = st.radio("Codage numérique de `cp`", codages, horizontal=True,
+                         index=codages.index(detecter_codage_cp(df)),
+                         help="Le modèle attend cp de 1 à 4 (comme data/*.csv) ; un fichier codé "
+                              "de 0 à 3 est remonté d'un cran.")
+    arrondir = False
+    non_entieres = colonnes_non_entieres(df)
+    if non_entieres:
+        # Arrondi explicite seulement : les lignes concernées sont signalées tant qu'il n'est pas coché
+        arrondir = st.checkbox(f"Arrondir les valeurs non entières de {', '.join(non_entieres)} "
+                               "à l'entier le plus proche")
+    # Résultats conservés par fichier et options : un rerun (téléchargement, widget) ne relance pas le scoring
+    cle = (hashlib.sha256(contenu).hexdigest(), codage_cp, arrondir)
+    resultats = st.session_state.setdefault("resultats_lot", {})
+
+    if cle not in resultats:
+        X, erreurs = preparer_lot(df, codage_cp, arrondir)
+        if erreurs:
+            for erreur in erreurs:
+                st.error(f"❌ {erreur}")
+            return
+        if not st.button(f"📤 Scorer les {len(X)} patients"):
+            return
+        barre = st.progress(0.0, text="⏳ Envoi des données à l'API...")
+        try:
+            scores = scorer_lot(X, barre)
+        except Exception as e:
+            st.error(f"💥 Impossible de contacter l'API : {e}")
+            return
+        resultats.clear()  # un seul lot conservé par session
+        resultats[cle] = pd.concat([df, scores], axis=1)
+
+    resultat = resultats[cle]
+    n_risque = int((resultat["prediction"] == 1).sum())
+    cols = st.columns(3)
+    cols[0].metric("Patients", len(resultat))
+    cols[1].metric("💔 Risque détecté", n_risque)
+    cols[2].metric("💚 Aucun risque", len(resultat) - n_risque)
+    st.dataframe(resultat, use_container_width=True)
+    st.download_button(
+        "💾 Télécharger les résultats",
+        resultat.to_csv(index=False).encode("utf-8"),
+        file_name=f"predictions_{fichier.name}",
+        mime="text/csv",
+    )
+
+
+def afficher_explication(input_data):
+    """Contributions de chaque variable à la prédiction du modèle servi (endpoint /explain)"""
+    import pandas as pd
+    response = get_client().post("/explain", json=input_data)
+    if response.status_code != 200:
+        st.caption(f"ℹ️ Explication non disponible ({response.status_code})")
+        return
+    explication = response.json()
+    contributions = pd.Series(explication["contributions"], name="Contribution")
+    contributions = contributions.reindex(contributions.abs().sort_values(ascending=False).index)
+    unite = "en log-odds" if explication["space"] == "log-odds" else "en probabilité"
+    st.subheader("🔍 Contribution de chaque variable")
+    st.bar_chart(contributions, horizontal=True)
+    calibration = (f" Elles expliquent la probabilité brute du modèle ({explication['model_probability']:.1%}) ; "
+                   "la confiance affichée est calibrée." if explication.get("calibrated") else "")
+    st.caption(f"Contributions {unite} vers la classe « malade » : les valeurs positives augmentent "
+               f"le risque, les négatives le diminuent. Valeur de base : {explication['base']:.3f}.{calibration}")
+
 
 def page_prediction():
     st.title("🔬 Prédiction de Maladie Cardiaque")
-    st.markdown("Remplissez les informations du patient pour prédire le risque de maladie cardiaque :")
+    mode = st.radio("Mode", ["👤 Patient unique", "📁 Fichier de patients"], horizontal=True)
+    if mode == "📁 Fichier de patients":
+        page_prediction_fichier()
+        return
 
-    # Dictionnaires de correspondance
-    sex_map = {"Femme": 0, "Homme": 1}
-    cp_map = {
-        "Angine typique": 0,
-        "Angine atypique": 1,
-        "Douleur non-angineuse": 2,
-        "Asymptomatique": 3
-    }
-    fbs_map = {"≤ 120 mg/dl": 0, "> 120 mg/dl": 1}
-    restecg_map = {
-        "Normal": 0,
-        "Anomalie onde ST-T": 1,
-        "Hypertrophie ventriculaire gauche": 2
-    }
+    st.markdown("Remplissez les informations du patient pour prédire le risque de maladie cardiaque :")
 
     # Formulaire en colonnes
     col1, col2 = st.columns(2)
@@ -55,7 +243,7 @@ def page_prediction():
     if st.button("📤 Lancer la prédiction"):
         with st.spinner("⏳ Envoi des données à l'API..."):
             try:
-                response = requests.post("http://localhost:8000/predict", json=input_data)
+                response = get_client().post("/predict", json=input_data)
                 if response.status_code == 200:
                     result = response.json()
                     prediction = result.get("prediction")
@@ -76,6 +264,8 @@ def page_prediction():
                     else:
                         st.info("ℹ️ Confiance du modèle non disponible")
 
+                    afficher_explication(input_data)
+
                 else:
                     st.error(f"❌ Erreur API : {response.status_code} - {response.text}")
 
@@ -0,0 +1,168 @@
+# rechargement.py
+# Rechargement à chaud du modèle servi par l'API : une nouvelle version est chargée
+# en arrière-plan, validée sur le jeu de test, puis substituée atomiquement. Chaque
+# requête lit la version courante une seule fois et se termine donc sur celle-ci.
+# Le fichier surveillé et sa calibration (<modèle>.calibration.json, exportée par
+# seuils.py) forment ensemble la signature de la version : exporter une calibration
+# suffit pour que chaque processus de l'API la prenne en compte.
+
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+
+from artefacts import charger_modele
+from cache_predictions import signature_fichier
+from inference import MoteurLineaire
+from registre import FEATURES
+from seuils import charger_calibration, chemin_calibration
+
+
+def construire_moteur(pipeline, X_test):
+    """Moteur NumPy si sa parité avec predict_proba est vérifiée, sinon None"""
+    try:
+        moteur = MoteurLineaire.depuis_pipeline(pipeline)
+    except ValueError as e:
+        print(f"Moteur rapide désactivé : {e}")
+        return None
+    if not moteur.verifier_parite(pipeline, X_test):
+        print("Moteur rapide désactivé : sorties différentes de predict_proba")
+        return None
+    return moteur
+
+
+def signature_version(chemin):
+    """Signature du modèle et de sa calibration (None si absente) ; OSError si le modèle manque"""
+    try:
+        calibration = signature_fichier(chemin_calibration(chemin))
+    except OSError:
+        calibration = None
+    return (signature_fichier(chemin), calibration)
+
+
+class VersionModele:
+    """Version immuable du modèle servi : pipeline, moteur rapide et identité du fichier"""
+
+    def __init__(self, chemin, pipeline, moteur, signature, duree_chargement, calibration=None,
+                 signature_calibration=None):
+        self.chemin = chemin
+        self.pipeline = pipeline
+        self.moteur = moteur
+        self.signature = signature
+        self.signature_calibration = signature_calibration
+        self.calibration = calibration
+        # La calibration fait partie de l'identité : les réponses mises en cache en dépendent
+        self.identite = (chemin, signature,
+                         (calibration.methode, calibration.a, calibration.b, calibration.seuil)
+                         if calibration else None)
+        self.classes_ = pipeline.classes_
+        self.duree_chargement = duree_chargement
+        self.charge_le = time.time()
+
+    def predict_proba(self, X):
+        if self.moteur is not None:
+            return self.moteur.predict_proba(X)
+        return self.pipeline.predict_proba(pd.DataFrame(X, columns=FEATURES))
+
+    def decrire(self):
+        return {
+            "path": self.chemin,
+            "signature": list(self.signature),
+            "fast_engine": self.moteur is not None,
+            "calibration": self.calibration.decrire() if self.calibration is not None else None,
+            "load_seconds": round(self.duree_chargement, 4),
+            "loaded_at": self.charge_le,
+        }
+
+
+def valider(pipeline, X_test, y_test, precision_min):
+    """Lève ValueError si le candidat n'est pas servable à la place du modèle actuel"""
+    noms = getattr(pipeline, "feature_names_in_", None)
+    if noms is not None and list(noms) != FEATURES:
+        raise ValueError(f"Variables attendues {FEATURES}, reçues {list(noms)}")
+    probas = pipeline.predict_proba(X_test)
+    if probas.shape != (len(X_test), len(pipeline.classes_)) or not np.isfinite(probas).all():
+        raise ValueError("predict_proba renvoie des valeurs invalides")
+    if not np.allclose(probas.sum(axis=1), 1.0):
+        raise ValueError("Les probabilités ne somment pas à 1")
+    precision = float((pipeline.classes_[probas.argmax(axis=1)] == np.ravel(y_test)).mean())
+    if precision < precision_min:
+        raise ValueError(f"Accuracy {precision:.3f} inférieure au minimum {precision_min:.3f}")
+    return precision
+
+
+class ModeleServi:
+    """Détient la version courante du modèle et la remplace sans interrompre le service"""
+
+    def __init__(self, chemin, X_test, y_test, precision_min=0.6, apres_bascule=None):
+        self.chemin = chemin
+        self.X_test = X_test
+        self.y_test = y_test
+        self.precision_min = precision_min
+        self.apres_bascule = apres_bascule
+        self._lock = threading.Lock()   # sérialise les rechargements, pas les lectures
+        self._arret = threading.Event()
+        self.dernier_resultat = None
+        self.courant = self._charger()  # premier chargement : une erreur doit être fatale
+
+    def _charger(self):
+        signature, signature_calibration = signature_version(self.chemin)
+        debut = time.perf_counter()
+        pipeline = charger_modele(self.chemin)
+        valider(pipeline, self.X_test, self.y_test, self.precision_min)
+        moteur = construire_moteur(pipeline, self.X_test)
+        calibration = charger_calibration(self.chemin)
+        return VersionModele(self.chemin, pipeline, moteur, signature, time.perf_counter() - debut, calibration,
+                             signature_calibration)
+
+    def _signature_courante(self):
+        return (self.courant.signature, self.courant.signature_calibration)
+
+    def recharger(self, force=False):
+        """Charge et valide le fichier courant puis bascule ; l'ancienne version reste
+        servie en cas d'échec"""
+        with self._lock:
+            if not force and signature_version(self.chemin) == self._signature_courante():
+                return {"status": "unchanged"}
+            try:
+                nouvelle = self._charger()
+            except Exception as e:
+                self.dernier_resultat = {"status": "rejected", "error": str(e), "at": time.time()}
+                print(f"Rechargement refusé : {e}")
+                return self.dernier_resultat
+            ancienne, self.courant = self.courant, nouvelle  # affectation atomique
+            self.dernier_resultat = {"status": "reloaded", "at": time.time(), **nouvelle.decrire()}
+        if self.apres_bascule is not None:
+            self.apres_bascule(ancienne, nouvelle)
+        return self.dernier_resultat
+
+    def recharger_en_arriere_plan(self, force=True):
+        threading.Thread(target=self.recharger, kwargs={"force": force}, daemon=True).start()
+
+    def surveiller(self, intervalle):
+        """Thread de surveillance du modèle et de sa calibration : recharge quand leur
+        signature a changé et est restée stable sur deux sondages (fichiers entièrement écrits)"""
+        def boucle():
+            vue = refusee = None
+            while not self._arret.wait(intervalle):
+                try:
+                    signature = signature_version(self.chemin)
+                except OSError:
+                    continue
+                if signature in (self._signature_courante(), refusee):
+                    vue = None
+                elif signature != vue:
+                    vue = signature  # on attend un second sondage identique
+                else:
+                    if self.recharger().get("status") == "rejected":
+                        refusee = signature
+                    vue = None
+
+        self._arret.clear()
+        thread = threading.Thread(target=boucle, name="surveillance-modele", daemon=True)
+        thread.start()
+        return thread
+
+    def arreter(self):
+        self._arret.set()
@@ -0,0 +1,117 @@
+# registre.py
+# Registre des pipelines entraînés du dossier Pipeline/ : chargement paresseux,
+# borne LRU sur le nombre de modèles résidents et suivi de leur empreinte. La
+# calibration exportée par seuils.py à côté d'un pipeline est chargée avec lui.
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FEATURES = ['ca', 'age', 'sex', 'cp', 'trestbps', 'chol', 'fbs',
+            'restecg', 'thalach', 'oldpeak']
+
+OPTIMISED_MODEL_PATH = "logreg_model_optimise.joblib"
+PIPELINES_DIR = "Pipeline"
+MODEL_NAME_MAP = {
+    "rf": "Random Forest",
+    "xgb": "XGBoost",
+    "mlp": "MLP",
+    "dt": "Decision Tree",
+    "svm": "SVM",
+    "logreg": "Logistic Regression",
+    "knn": "k-NN",
+    "nb": "Naive Bayes"
+}
+
+
+def chemin_pipeline(code, dossier=PIPELINES_DIR):
+    return os.path.join(dossier, f"pipeline_{code}.pkl")
+
+
+class RegistreModeles:
+    """Charge les pipelines à la demande et garde au plus `max_resident` modèles en mémoire"""
+
+    def __init__(self, dossier=PIPELINES_DIR, max_resident=3):
+        self.dossier = dossier
+        self.max_resident = max_resident
+        self._modeles = OrderedDict()  # code -> modèle, du moins au plus récemment utilisé
+        self._infos = {}               # code -> empreinte et temps de chargement
+        self._calibrations = {}        # code -> (signature des fichiers, calibration ou None)
+        self._lock = threading.Lock()
+        self._locks_chargement = {code: threading.Lock() for code in MODEL_NAME_MAP}
+
+    def codes(self):
+        return [code for code in MODEL_NAME_MAP if os.path.exists(chemin_pipeline(code, self.dossier))]
+
+    def obtenir(self, code):
+        """Retourne le modèle `code`, en le chargeant si besoin (KeyError si inconnu)"""
+        if code not in MODEL_NAME_MAP or not os.path.exists(chemin_pipeline(code, self.dossier)):
+            raise KeyError(code)
+        with self._lock:
+            if code in self._modeles:
+                self._modeles.move_to_end(code)
+                return self._modeles[code]
+        # Un seul chargement par code, sans bloquer les autres modèles déjà résidents
+        with self._locks_chargement[code]:
+            with self._lock:
+                if code in self._modeles:
+                    self._modeles.move_to_end(code)
+                    return self._modeles[code]
+            debut = time.perf_counter()
+            # Import différé : joblib est inutile aux pages qui n'utilisent que FEATURES
+            from artefacts import charger_modele, taille_chargee
+            modele = charger_modele(chemin_pipeline(code, self.dossier))
+            duree = time.perf_counter() - debut
+            # Estimée par la taille du fichier chargé : re-sérialiser le modèle
+            # recopierait en mémoire les tableaux projetés par mmap
+            empreinte = taille_chargee(chemin_pipeline(code, self.dossier))
+            self.calibration(code)
+            with self._lock:
+                self._modeles[code] = modele
+                self._infos[code] = {"footprint_bytes": empreinte, "load_seconds": round(duree, 4)}
+                while len(self._modeles) > self.max_resident:
+                    self._modeles.popitem(last=False)
+            return modele
+
+    def calibration(self, code):
+        """Calibration exportée par seuils.py pour `code`, ou None ; relue quand son fichier
+        ou celui du modèle change (un os.stat par fichier sinon)"""
+        from seuils import charger_calibration, chemin_calibration
+        chemin = chemin_pipeline(code, self.dossier)
+        signature = []
+        for fichier in (chemin, chemin_calibration(chemin)):
+            try:
+                stat = os.stat(fichier)
+                signature.append((stat.st_mtime_ns, stat.st_size))
+            except OSError:
+                signature.append(None)
+        with self._lock:
+            memo = self._calibrations.get(code)
+        if memo is not None and memo[0] == signature:
+            return memo[1]
+        calibration = charger_calibration(chemin) if signature[1] is not None else None
+        with self._lock:
+            self._calibrations[code] = (signature, calibration)
+        return calibration
+
+    def decrire(self):
+        """État de chaque modèle disponible pour l'endpoint GET /models"""
+        with self._lock:
+            charges = set(self._modeles)
+            infos = dict(self._infos)
+            calibrations = {code: memo[1] for code, memo in self._calibrations.items()}
+        description = []
+        for code in self.codes():
+            info = infos.get(code, {})
+            description.append({
+                "code": code,
+                "name": MODEL_NAME_MAP[code],
+                "path": chemin_pipeline(code, self.dossier),
+                "loaded": code in charges,
+                "file_bytes": os.path.getsize(chemin_pipeline(code, self.dossier)),
+                "footprint_bytes": info.get("footprint_bytes") if code in charges else None,
+                "load_seconds": info.get("load_seconds"),
+                "calibration": calibrations[code].decrire() if calibrations.get(code) is not None else None,
+            })
+        return description
@@ -1,13 +1,47 @@
+import argparse
+import os
 import subprocess
 import time
+import urllib.request
 import webbrowser
 import sys
 
+API_URL = "http://localhost:8000/"
+
+
+def attendre_api(process, url=API_URL, delai=60):
+    """Sonde de disponibilité : attend que l'API réponde au lieu d'un délai fixe"""
+    limite = time.monotonic() + delai
+    while time.monotonic() < limite:
+        if process.poll() is not None:
+            return False
+        try:
+            with urllib.request.urlopen(url, timeout=1) as response:
+                if response.status == 200:
+                    return True
+        except OSError:
+            pass
+        time.sleep(0.1)
+    return False
+
+
+parser = argparse.ArgumentParser(description="Lance l'API et le dashboard Streamlit")
+parser.add_argument("--prod", action="store_true",
+                    help="API multi-workers avec modèle préchargé (serveur_production.py)")
+parser.add_argument("--workers", type=int, default=os.cpu_count() or 1,
+                    help="Nombre de workers de l'API en mode --prod")
+args = parser.parse_args()
 
 # Lancer l'API FastAPI sur http://localhost:8000
-api_process = subprocess.Popen([sys.executable, "-m", "uvicorn", "API:app", "--reload"])
-# Attendre un petit moment que l'API démarre
-time.sleep(2)
+if args.prod:
+    api_process = subprocess.Popen([sys.executable, "serveur_production.py", "--workers", str(args.workers)])
+else:
+    api_process = subprocess.Popen([sys.executable, "-m", "uvicorn", "API:app", "--reload"])
+# Attendre que l'API soit prête
+if not attendre_api(api_process):
+    print("L'API n'a pas démarré, arrêt.")
+    api_process.terminate()
+    sys.exit(1)
 
 streamlit_process = subprocess.Popen([sys.executable, "-m", "streamlit", "run", "app.py"])
 # (Optionnel) ouvrir automatiquement le dashboard
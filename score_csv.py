@@ -0,0 +1,168 @@
+# score_csv.py
+# Scoring hors ligne de gros fichiers patients (format data/X_test.csv) :
+# lecture par blocs, validation des colonnes, écriture incrémentale CSV/Parquet.
+#
+#   python score_csv.py data/X_test.csv predictions.csv --model rf
+#   python score_csv.py export.parquet predictions.parquet --chunksize 200000
+
+import argparse
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from artefacts import charger_modele
+from registre import FEATURES, MODEL_NAME_MAP, OPTIMISED_MODEL_PATH, chemin_pipeline
+
+
+def resoudre_modele(nom):
+    """Chemin du modèle : code du registre, 'optimise' ou chemin explicite"""
+    if nom == "optimise":
+        return OPTIMISED_MODEL_PATH
+    if nom in MODEL_NAME_MAP:
+        return chemin_pipeline(nom)
+    return nom
+
+
+def lire_par_blocs(chemin, chunksize, sep=","):
+    """Itère sur le fichier d'entrée par DataFrames d'au plus `chunksize` lignes"""
+    if chemin.endswith(".parquet"):
+        import pyarrow.parquet as pq
+        fichier = pq.ParquetFile(chemin)
+        if fichier.metadata.num_rows == 0:
+            # Bloc vide : la sortie garde au moins ses en-têtes
+            yield fichier.schema_arrow.empty_table().to_pandas()
+            return
+        for batch in fichier.iter_batches(batch_size=chunksize):
+            yield batch.to_pandas()
+    else:
+        try:
+            yield from pd.read_csv(chemin, sep=sep, chunksize=chunksize)
+        except pd.errors.EmptyDataError:
+            # Fichier vide, sans ligne d'en-tête
+            yield pd.DataFrame(columns=FEATURES)
+
+
+class EcrivainIncremental:
+    """Écrit les blocs de résultats au fil de l'eau, en CSV ou en Parquet
+
+    Le schéma Parquet est fixé au premier bloc : variables FEATURES en float64,
+    prediction en int64, confidence en float64 ; les autres colonnes gardent le type
+    du premier bloc et les blocs suivants y sont convertis.
+    """
+
+    def __init__(self, chemin):
+        self.chemin = chemin
+        self.parquet = chemin.endswith(".parquet")
+        self._writer = None
+        self._entete = True
+
+    @staticmethod
+    def _schema(table):
+        import pyarrow as pa
+        fixes = {**{f: pa.float64() for f in FEATURES}, "prediction": pa.int64(), "confidence": pa.float64()}
+        return pa.schema([pa.field(c.name, fixes.get(c.name, c.type)) for c in table.schema])
+
+    def ecrire(self, df):
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None:
+                self._writer = pq.ParquetWriter(self.chemin, self._schema(table))
+            try:
+                table = table.cast(self._writer.schema)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError, ValueError) as e:
+                raise ValueError(f"Bloc incompatible avec le schéma du fichier de sortie : {e}")
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.chemin, mode="w" if self._entete else "a", header=self._entete, index=False)
+            self._entete = False
+
+    def fermer(self):
+        if self._writer is not None:
+            self._writer.close()
+
+
+def scorer_bloc(model, bloc, debut_ligne=0):
+    """Valide un bloc et ajoute les colonnes prediction / confidence"""
+    manquantes = [f for f in FEATURES if f not in bloc.columns]
+    if manquantes:
+        raise ValueError(f"Colonnes manquantes : {manquantes}")
+    X = bloc[FEATURES].apply(pd.to_numeric, errors="coerce").astype(np.float64)
+    invalides = X.isna().any(axis=1).to_numpy()
+    if invalides.any():
+        ligne = debut_ligne + int(np.argmax(invalides)) + 1
+        raise ValueError(f"Valeur manquante ou non numérique à la ligne {ligne}")
+    resultat = bloc.copy()
+    # Variables au type fixe float64, quel que soit le type inféré pour ce bloc
+    resultat[FEATURES] = X
+    if len(X) == 0:
+        # Bloc vide (fichier sans lignes) : colonnes de sortie sans appel au modèle
+        resultat["prediction"] = np.empty(0, dtype=np.int64)
+        resultat["confidence"] = np.empty(0, dtype=np.float64)
+        return resultat
+    probas = model.predict_proba(X)
+    idx = probas.argmax(axis=1)
+    resultat["prediction"] = model.classes_[idx].astype(np.int64)
+    resultat["confidence"] = probas[np.arange(len(idx)), idx].round(4)
+    return resultat
+
+
+def scorer_fichier(entree, sortie, model_path=OPTIMISED_MODEL_PATH, chunksize=100_000, sep=",",
+                   progression=None):
+    """Score `entree` bloc par bloc vers `sortie` ; retourne un rapport de débit"""
+    model = charger_modele(model_path)
+    ecrivain = EcrivainIncremental(sortie)
+    n_lignes = n_blocs = 0
+    debut = time.perf_counter()
+    try:
+        for bloc in lire_par_blocs(entree, chunksize, sep=sep):
+            ecrivain.ecrire(scorer_bloc(model, bloc, debut_ligne=n_lignes))
+            n_lignes += len(bloc)
+            n_blocs += 1
+            if progression is not None:
+                progression(n_lignes, time.perf_counter() - debut)
+    finally:
+        ecrivain.fermer()
+    duree = time.perf_counter() - debut
+    return {
+        "model": model_path,
+        "rows": n_lignes,
+        "chunks": n_blocs,
+        "seconds": round(duree, 3),
+        "rows_per_second": round(n_lignes / duree, 1) if duree > 0 else None,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Scoring par blocs d'un fichier de patients")
+    parser.add_argument("entree", help="Fichier CSV ou Parquet contenant les colonnes FEATURES")
+    parser.add_argument("sortie", help="Fichier de résultats (.csv ou .parquet)")
+    parser.add_argument("--model", default="optimise",
+                        help=f"'optimise', un code parmi {list(MODEL_NAME_MAP)} ou un chemin de modèle")
+    parser.add_argument("--chunksize", type=int, default=100_000, help="Nombre de lignes par bloc")
+    parser.add_argument("--sep", default=",", help="Séparateur du CSV d'entrée")
+    args = parser.parse_args(argv)
+
+    model_path = resoudre_modele(args.model)
+    if not os.path.exists(model_path):
+        parser.error(f"Modèle introuvable : {model_path}")
+
+    def afficher(n_lignes, duree):
+        print(f"  {n_lignes:,} lignes scorées ({n_lignes / duree:,.0f} lignes/s)", file=sys.stderr)
+
+    try:
+        rapport = scorer_fichier(args.entree, args.sortie, model_path, args.chunksize, args.sep, afficher)
+    except ValueError as e:
+        print(f"Erreur : {e}", file=sys.stderr)
+        return 1
+    print(f"✅ {rapport['rows']:,} lignes en {rapport['seconds']} s "
+          f"({rapport['rows_per_second']:,} lignes/s) -> {args.sortie}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
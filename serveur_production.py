@@ -0,0 +1,246 @@
+# serveur_production.py
+# Lancement de production de l'API : le processus maître charge API.py (et donc le modèle)
+# une seule fois, ouvre le socket d'écoute puis forke N workers uvicorn qui partagent les
+# poids en copy-on-write. Un worker n'est considéré prêt qu'une fois son serveur démarré.
+#
+#   python serveur_production.py --workers 4 --port 8000
+#
+# Signaux du maître :
+#   SIGHUP          redémarrage progressif : API.py est rechargé (nouveau modèle compris),
+#                   puis chaque worker est remplacé un par un, sans interruption de service
+#   SIGTERM/SIGINT  arrêt gracieux de tous les workers (requêtes en cours terminées)
+#   SIGUSR1         relayé à tous les workers : rechargement forcé du modèle servi
+#   SIGUSR2         relayé à tous les workers : réinitialisation du moniteur de dérive
+#
+# Chaque worker est un processus distinct. POST /admin/reload et POST /drift/reset,
+# reçus par un seul worker, passent par le maître (SIGUSR1/SIGUSR2) pour atteindre tous
+# les workers ; /metrics agrège les instantanés de tous les workers (METRICS_MULTIPROC_DIR,
+# au plus metriques.INTERVALLE_EXPORT secondes de retard). Restent propres au worker qui
+# répond (champ "worker" de la réponse) : /cache/stats, /drift et /admin/model — le cache
+# de prédictions et les fenêtres de dérive ne sont pas partagés.
+
+import argparse
+import importlib
+import os
+import select
+import signal
+import socket
+import sys
+import time
+
+import uvicorn
+
+import artefacts
+
+DELAI_PRET = 60      # secondes pour qu'un worker soit prêt
+DELAI_ARRET = 30     # secondes laissées aux requêtes en cours lors d'un arrêt
+RELANCE_MIN, RELANCE_MAX = 1, 60  # délai (s) avant un nouvel essai de démarrage, doublé à chaque échec
+SIGNAUX_RELAYES = (signal.SIGUSR1, signal.SIGUSR2)
+
+
+class ServeurWorker(uvicorn.Server):
+    """Serveur uvicorn qui signale au maître la fin de son démarrage"""
+
+    def __init__(self, config, fd_pret):
+        super().__init__(config)
+        self.fd_pret = fd_pret
+
+    async def startup(self, sockets=None):
+        await super().startup(sockets=sockets)
+        if not self.should_exit:
+            os.write(self.fd_pret, b"1")
+        os.close(self.fd_pret)
+
+
+class Maitre:
+    def __init__(self, module, host, port, workers, log_level="info"):
+        self.module = module
+        self.host, self.port = host, port
+        self.n_workers = workers
+        self.log_level = log_level
+        self.workers = {}  # pid -> génération
+        self.generation = 0
+        self.arret = False
+        self.redemarrage = False
+        self.delai_relance = RELANCE_MIN
+        self.prochaine_relance = 0.0
+        self.a_relayer = []
+
+    def ouvrir_socket(self):
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((self.host, self.port))
+        sock.listen(2048)
+        sock.set_inheritable(True)
+        self.sock = sock
+
+    def lancer_worker(self):
+        """Forke un worker et attend qu'il soit prêt ; retourne son pid"""
+        lecture, ecriture = os.pipe()
+        pid = os.fork()
+        if pid == 0:
+            os.close(lecture)
+            for sig in (signal.SIGHUP, signal.SIGTERM, signal.SIGINT, signal.SIGCHLD):
+                signal.signal(sig, signal.SIG_DFL)
+            # Ignorés jusqu'à ce que le lifespan du worker installe ses propres handlers
+            for sig in SIGNAUX_RELAYES:
+                signal.signal(sig, signal.SIG_IGN)
+            try:
+                config = uvicorn.Config(self.module.app, log_level=self.log_level, lifespan="on")
+                ServeurWorker(config, ecriture).run(sockets=[self.sock])
+            except BaseException:
+                # Jamais de retour dans la boucle du maître depuis le processus enfant
+                os._exit(1)
+            os._exit(0)
+        os.close(ecriture)
+        try:
+            prets, _, _ = select.select([lecture], [], [], DELAI_PRET)
+            ok = bool(prets) and os.read(lecture, 1) == b"1"
+        except InterruptedError:
+            ok = False
+        finally:
+            os.close(lecture)
+        if not ok:
+            self.arreter_worker(pid)
+            raise RuntimeError(f"Le worker {pid} n'est pas devenu prêt")
+        self.workers[pid] = self.generation
+        print(f"[maître] worker {pid} prêt (génération {self.generation})", flush=True)
+        return pid
+
+    def arreter_worker(self, pid, delai=DELAI_ARRET):
+        """SIGTERM (arrêt gracieux uvicorn), puis SIGKILL si le délai est dépassé"""
+        try:
+            os.kill(pid, signal.SIGTERM)
+        except ProcessLookupError:
+            pass
+        limite = time.monotonic() + delai
+        while time.monotonic() < limite:
+            try:
+                fini, _ = os.waitpid(pid, os.WNOHANG)
+            except ChildProcessError:
+                break
+            if fini:
+                break
+            time.sleep(0.05)
+        else:
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+        self.workers.pop(pid, None)
+
+    def redemarrer(self):
+        """Recharge API.py dans le maître puis remplace les workers un par un"""
+        print("[maître] redémarrage progressif", flush=True)
+        try:
+            self.module = importlib.reload(self.module)
+        except Exception as e:
+            print(f"[maître] rechargement impossible, workers conservés : {e}", flush=True)
+            return
+        self.generation += 1
+        for pid in [p for p, g in self.workers.items() if g < self.generation]:
+            try:
+                self.lancer_worker()
+            except (RuntimeError, OSError) as e:
+                print(f"[maître] {e} ; redémarrage interrompu, workers en place conservés", flush=True)
+                return
+            self.arreter_worker(pid)
+
+    def recolter(self):
+        """Retire les workers morts de façon inattendue (relancés par completer)"""
+        while True:
+            try:
+                pid, statut = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            if pid in self.workers:
+                self.workers.pop(pid)
+                print(f"[maître] worker {pid} terminé (statut {statut}), relance", flush=True)
+
+    def completer(self):
+        """Démarre les workers manquants ; un échec est réessayé plus tard, les autres workers continuent"""
+        while not self.arret and len(self.workers) < self.n_workers:
+            if time.monotonic() < self.prochaine_relance:
+                return
+            try:
+                self.lancer_worker()
+            except (RuntimeError, OSError) as e:
+                print(f"[maître] {e} ; nouvel essai dans {self.delai_relance} s", flush=True)
+                self.prochaine_relance = time.monotonic() + self.delai_relance
+                self.delai_relance = min(2 * self.delai_relance, RELANCE_MAX)
+                return
+            self.delai_relance = RELANCE_MIN
+
+    def relayer(self):
+        """Transmet à tous les workers les signaux d'administration reçus par le maître"""
+        while self.a_relayer:
+            sig = self.a_relayer.pop(0)
+            for pid in list(self.workers):
+                try:
+                    os.kill(pid, sig)
+                except ProcessLookupError:
+                    pass
+            print(f"[maître] {signal.Signals(sig).name} relayé à {len(self.workers)} workers", flush=True)
+
+    def executer(self):
+        self.ouvrir_socket()
+        signal.signal(signal.SIGTERM, lambda *_: setattr(self, "arret", True))
+        signal.signal(signal.SIGINT, lambda *_: setattr(self, "arret", True))
+        signal.signal(signal.SIGHUP, lambda *_: setattr(self, "redemarrage", True))
+        for sig in SIGNAUX_RELAYES:
+            signal.signal(sig, lambda signum, _: self.a_relayer.append(signum))
+        self.completer()
+        print(f"[maître] {len(self.workers)}/{self.n_workers} workers à l'écoute "
+              f"sur http://{self.host}:{self.port}", flush=True)
+        while not self.arret:
+            if self.redemarrage:
+                self.redemarrage = False
+                self.redemarrer()
+            self.recolter()
+            self.completer()
+            self.relayer()
+            time.sleep(0.5)
+        print("[maître] arrêt des workers...", flush=True)
+        for pid in list(self.workers):
+            os.kill(pid, signal.SIGTERM)
+        for pid in list(self.workers):
+            self.arreter_worker(pid)
+        self.sock.close()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serveur de production multi-workers de l'API")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--log-level", default="warning")
+    args = parser.parse_args(argv)
+
+    if not hasattr(os, "fork"):
+        # Pas de fork (Windows) : workers uvicorn classiques, sans préchargement partagé
+        uvicorn.run("API:app", host=args.host, port=args.port, workers=args.workers,
+                    log_level=args.log_level)
+        return 0
+
+    # Artefacts memory-mappés à jour : les workers partagent les poids via le cache de pages
+    for source in artefacts.sources_par_defaut():
+        if not artefacts.a_jour(source):
+            artefacts.exporter(source)
+
+    # Instantanés de métriques des workers, agrégés au scraping ; repartis de zéro à
+    # chaque lancement du maître (remise à zéro des compteurs, comme un redémarrage)
+    dossier = os.path.join(".cache", "metriques", str(args.port))
+    os.makedirs(dossier, exist_ok=True)
+    for nom in os.listdir(dossier):
+        os.remove(os.path.join(dossier, nom))
+    os.environ["METRICS_MULTIPROC_DIR"] = os.path.abspath(dossier)
+    os.environ["SERVEUR_MAITRE_PID"] = str(os.getpid())
+
+    # Préchargement avant fork : le modèle est partagé en copy-on-write par les workers
+    module = importlib.import_module("API")
+    Maitre(module, args.host, args.port, args.workers, args.log_level).executer()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,277 @@
+# seuils.py
+# Réglage du seuil de décision et calibration des probabilités. Les probabilités de
+# chaque pipeline sur le jeu de test sont celles du store d'évaluations (calculées une
+# seule fois par modèle) ; courbes ROC/PR, AUC et balayage des seuils s'obtiennent
+# ensuite par un tri et des sommes cumulées, sans re-prédire pour chaque seuil.
+# La calibration (Platt) et le seuil retenu sont exportés à côté du modèle dans un
+# JSON que l'API applique à ses probabilités. Ils sont ajustés sur ce même jeu de test :
+# la performance annoncée est donc estimée par validation croisée de toute la
+# procédure (calibration et choix du seuil refaits sur chaque pli d'apprentissage,
+# décisions évaluées sur le pli mis de côté).
+#
+#   python seuils.py --model optimise --rappel-min 0.9
+#   python seuils.py --model rf --sans-calibration
+
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+from scipy.special import expit, logit
+
+from evaluations import StoreEvaluations, hash_fichier
+
+CALIBRATION_SUFFIXE = ".calibration.json"
+EPSILON = 1e-6  # bornes des probabilités avant logit
+N_PLIS = 5
+RANDOM_STATE = 42
+
+
+def depuis_metriques(metriques):
+    """(y binaire, probabilité de la classe positive) conservés avec les métriques d'un modèle"""
+    if metriques.get("proba") is None:
+        raise ValueError("Le modèle ne fournit pas de predict_proba")
+    y_true = np.asarray(metriques["y_true"])
+    # Classe positive : la dernière, comme la colonne de probabilité conservée
+    return (y_true == np.unique(y_true)[-1]).astype(np.int64), np.asarray(metriques["proba"], dtype=np.float64)
+
+
+def probabilites(model_path, X_test, y_test, store=None):
+    """Probabilités du modèle sur le jeu de test, calculées une seule fois grâce au store"""
+    return depuis_metriques((store or StoreEvaluations()).evaluer(model_path, X_test, y_test))
+
+
+def a_seuil(tableau, seuil):
+    """Ligne du balayage correspondant à un seuil quelconque (positif si proba >= seuil)"""
+    atteints = tableau[tableau["seuil"] >= seuil]
+    if len(atteints):
+        return atteints.iloc[-1]
+    # Seuil au-dessus de toutes les probabilités : aucun positif prédit
+    P, N = tableau["tp"].iloc[-1], tableau["fp"].iloc[-1]
+    return pd.Series({"seuil": seuil, "precision": np.nan, "rappel": 0.0, "specificite": 1.0, "f1": 0.0,
+                      "accuracy": N / (P + N), "tp": 0, "fp": 0, "fn": P, "tn": N})
+
+
+def comptes_par_seuil(y, scores):
+    """Vrais/faux positifs pour chaque seuil distinct, du plus haut au plus bas (un seul tri)"""
+    ordre = np.argsort(scores, kind="mergesort")[::-1]
+    scores, y = scores[ordre], y[ordre]
+    # Dernière position de chaque valeur distincte : les ex aequo basculent ensemble
+    fins = np.r_[np.flatnonzero(np.diff(scores)), len(y) - 1]
+    tp = np.cumsum(y)[fins]
+    fp = fins + 1 - tp
+    return scores[fins], tp, fp
+
+
+def courbe_roc(y, scores):
+    seuils, tp, fp = comptes_par_seuil(y, scores)
+    P, N = tp[-1], fp[-1]
+    return np.r_[0.0, fp / N], np.r_[0.0, tp / P], np.r_[np.inf, seuils]
+
+
+def courbe_pr(y, scores):
+    seuils, tp, fp = comptes_par_seuil(y, scores)
+    return tp / (tp + fp), tp / tp[-1], seuils
+
+
+def aire(x, y):
+    """Aire sous la courbe par la méthode des trapèzes"""
+    return float(np.sum(np.diff(x) * (y[1:] + y[:-1]) / 2))
+
+
+def roc_auc(y, scores):
+    fpr, tpr, _ = courbe_roc(y, scores)
+    return aire(fpr, tpr)
+
+
+def precision_moyenne(y, scores):
+    """Average precision : précision pondérée par les gains de rappel"""
+    precision, rappel, _ = courbe_pr(y, scores)
+    return float(np.sum(np.diff(np.r_[0.0, rappel]) * precision))
+
+
+def balayage(y, scores):
+    """Métriques à chaque seuil distinct (prédiction positive si proba >= seuil)"""
+    seuils, tp, fp = comptes_par_seuil(y, scores)
+    P, N = tp[-1], fp[-1]
+    fn, tn = P - tp, N - fp
+    precision = tp / (tp + fp)
+    rappel = tp / P
+    with np.errstate(invalid="ignore", divide="ignore"):
+        f1 = np.where(tp > 0, 2 * precision * rappel / (precision + rappel), 0.0)
+    return pd.DataFrame({
+        "seuil": seuils,
+        "precision": precision,
+        "rappel": rappel,
+        "specificite": tn / N,
+        "f1": f1,
+        "accuracy": (tp + tn) / (P + N),
+        "tp": tp, "fp": fp, "fn": fn, "tn": tn,
+    })
+
+
+def choisir_seuil(tableau, rappel_min=None):
+    """Seuil le plus haut atteignant `rappel_min` (dépistage), sinon celui qui maximise le F1 ;
+    None si aucun seuil n'atteint `rappel_min` (aucun positif, rappel_min > 1)"""
+    if rappel_min is not None:
+        candidats = tableau[tableau["rappel"] >= rappel_min]
+        if candidats.empty:
+            return None
+        return candidats.iloc[0]  # seuils décroissants : meilleure précision à rappel atteint
+    return tableau.loc[tableau["f1"].idxmax()]
+
+
+# === 🎯 Calibration ===
+def ajuster_platt(y, scores):
+    """Paramètres (a, b) de p_calibrée = sigmoïde(a · logit(p) + b) par maximum de vraisemblance"""
+    from sklearn.linear_model import LogisticRegression
+    z = logit(np.clip(scores, EPSILON, 1 - EPSILON)).reshape(-1, 1)
+    lr = LogisticRegression(C=1e6).fit(z, y)
+    return float(lr.coef_[0, 0]), float(lr.intercept_[0])
+
+
+def brier(y, scores):
+    return float(np.mean((scores - y) ** 2))
+
+
+def metriques_decisions(y, positifs):
+    """Rappel, précision, spécificité, F1 et accuracy de décisions binaires"""
+    tp = int(np.sum(positifs & (y == 1)))
+    fp = int(np.sum(positifs & (y == 0)))
+    P, N = int(np.sum(y == 1)), int(np.sum(y == 0))
+    precision = tp / (tp + fp) if tp + fp else float("nan")
+    rappel = tp / P if P else float("nan")
+    return {
+        "rappel": rappel,
+        "precision": precision,
+        "specificite": (N - fp) / N if N else float("nan"),
+        "f1": 2 * tp / (tp + fp + P) if tp + fp + P else 0.0,
+        "accuracy": (tp + N - fp) / len(y),
+    }
+
+
+def validation_croisee(y, scores, rappel_min=None, calibrer=True, n_plis=N_PLIS, random_state=RANDOM_STATE):
+    """Performance hors échantillon de la procédure complète : sur chaque pli, calibration
+    et seuil sont ajustés sur les autres plis, puis appliqués au pli mis de côté ; les
+    métriques portent sur l'ensemble de ces décisions. None si trop peu de positifs."""
+    from sklearn.model_selection import StratifiedKFold
+    n_plis = min(n_plis, int(np.bincount(y, minlength=2).min()))
+    if n_plis < 2:
+        return None
+    positifs = np.zeros(len(y), dtype=bool)
+    plis = StratifiedKFold(n_plis, shuffle=True, random_state=random_state)
+    for app, val in plis.split(scores.reshape(-1, 1), y):
+        calibration = Calibration(methode="aucune")
+        if calibrer:
+            calibration = Calibration(*ajuster_platt(y[app], scores[app]))
+        tableau = balayage(y[app], calibration.calibrer(scores[app]))
+        ligne = choisir_seuil(tableau, rappel_min)
+        # Rappel visé hors d'atteinte : seuil le plus bas, rappel maximal
+        seuil = tableau["seuil"].iloc[-1] if ligne is None else ligne["seuil"]
+        positifs[val] = calibration.calibrer(scores[val]) >= seuil
+    return {**metriques_decisions(y, positifs), "n_plis": n_plis}
+
+
+class Calibration:
+    """Calibration de Platt et seuil de décision appliqués aux probabilités d'un modèle binaire"""
+
+    def __init__(self, a=1.0, b=0.0, seuil=0.5, methode="platt", infos=None):
+        self.a, self.b, self.seuil, self.methode = a, b, seuil, methode
+        self.infos = infos or {}
+
+    def calibrer(self, p1):
+        if self.methode == "aucune":
+            return p1
+        return expit(self.a * logit(np.clip(p1, EPSILON, 1 - EPSILON)) + self.b)
+
+    def decider(self, probas, classes):
+        """Étiquettes et confiances (probabilité calibrée de la classe prédite)"""
+        p1 = self.calibrer(probas[:, -1])
+        positif = p1 >= self.seuil
+        return classes[positif.astype(np.intp)], np.where(positif, p1, 1 - p1)
+
+    def decrire(self):
+        return {"method": self.methode, "a": self.a, "b": self.b, "threshold": self.seuil, **self.infos}
+
+
+def chemin_calibration(model_path):
+    return f"{model_path}{CALIBRATION_SUFFIXE}"
+
+
+def exporter_calibration(model_path, calibration):
+    """Écrit la calibration à côté du modèle, liée à son empreinte SHA-256"""
+    chemin = chemin_calibration(model_path)
+    contenu = {**calibration.decrire(), "model_sha256": hash_fichier(model_path), "created_at": time.time()}
+    tmp = f"{chemin}.{os.getpid()}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(contenu, f, indent=2)
+    os.replace(tmp, chemin)
+    return chemin
+
+
+def charger_calibration(model_path):
+    """Calibration du modèle, ou None si absente ou exportée pour une autre version du fichier"""
+    chemin = chemin_calibration(model_path)
+    if not os.path.exists(chemin):
+        return None
+    with open(chemin, encoding="utf-8") as f:
+        contenu = json.load(f)
+    if contenu.get("model_sha256") != hash_fichier(model_path):
+        print(f"Calibration ignorée : {chemin} a été exportée pour une autre version du modèle")
+        return None
+    infos = {k: v for k, v in contenu.items() if k not in ("method", "a", "b", "threshold")}
+    return Calibration(contenu["a"], contenu["b"], contenu["threshold"], contenu["method"], infos)
+
+
+def main(argv=None):
+    import donnees
+    from registre import FEATURES
+    from score_csv import resoudre_modele
+
+    parser = argparse.ArgumentParser(description="Seuil de décision et calibration d'un modèle")
+    parser.add_argument("--model", default="optimise", help="'optimise', un code du registre ou un chemin")
+    parser.add_argument("--rappel-min", type=float, default=None,
+                        help="Rappel minimal visé (dépistage) ; par défaut le seuil maximise le F1")
+    parser.add_argument("--sans-calibration", action="store_true", help="N'exporter que le seuil")
+    args = parser.parse_args(argv)
+    if args.rappel_min is not None and not 0 < args.rappel_min <= 1:
+        parser.error("--rappel-min doit être compris entre 0 (exclu) et 1")
+
+    model_path = resoudre_modele(args.model)
+    y, scores = probabilites(model_path, donnees.charger("X_test")[FEATURES], donnees.charger("y_test"))
+    print(f"{model_path} : ROC-AUC {roc_auc(y, scores):.4f}, AP {precision_moyenne(y, scores):.4f} "
+          f"({len(y)} patients)")
+
+    if args.sans_calibration:
+        calibration = Calibration(methode="aucune")
+    else:
+        a, b = ajuster_platt(y, scores)
+        calibration = Calibration(a, b)
+        print(f"Platt : a={a:.4f}, b={b:.4f} ; Brier {brier(y, scores):.4f} -> "
+              f"{brier(y, calibration.calibrer(scores)):.4f}")
+    # Seuil choisi sur les probabilités servies, donc calibrées
+    ligne = choisir_seuil(balayage(y, calibration.calibrer(scores)), args.rappel_min)
+    if ligne is None:
+        print(f"Erreur : aucun seuil n'atteint un rappel de {args.rappel_min} (aucun positif ?)", file=sys.stderr)
+        return 1
+    calibration.seuil = float(ligne["seuil"])
+    print(f"Seuil {calibration.seuil:.4f} sur les {len(y)} patients ayant servi à le choisir : "
+          f"rappel {ligne['rappel']:.3f}, précision {ligne['precision']:.3f}, "
+          f"spécificité {ligne['specificite']:.3f}, F1 {ligne['f1']:.3f} (optimiste)")
+    # Estimation honnête : la même procédure évaluée sur des plis non vus
+    cv = validation_croisee(y, scores, args.rappel_min, calibrer=not args.sans_calibration)
+    if cv is not None:
+        print(f"Validation croisée ({cv['n_plis']} plis) : rappel {cv['rappel']:.3f}, "
+              f"précision {cv['precision']:.3f}, spécificité {cv['specificite']:.3f}, F1 {cv['f1']:.3f}")
+    calibration.infos = {"fitted_on": "data/X_test.csv", "n": int(len(y)), "target_recall": args.rappel_min,
+                         "cross_validated": cv}
+    print(f"✅ {exporter_calibration(model_path, calibration)} "
+          "(prise en compte automatiquement par l'API en cours d'exécution)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,53 @@
+# tests/test_derive.py
+# Le profil de référence est construit dans le codage d'entraînement du modèle : un trafic
+# propre, tiré de clean_heart_data, ne dérive pas ; un cp envoyé en 0-3 est signalé.
+
+import numpy as np
+import pandas as pd
+
+from derive import MoniteurDerive, codage_modele, construire_profil
+from registre import FEATURES
+
+REFERENCE = "data/clean_heart_data.csv"
+
+
+def trafic_propre(n, graine=0):
+    """Patients tirés avec remise de la référence, envoyés tels quels dans le codage du
+    modèle (cp 1-4, ca imputé non entier)"""
+    data = pd.read_csv(REFERENCE, sep=";")
+    echantillon = data.sample(n, replace=True, random_state=graine)
+    return echantillon[FEATURES].to_numpy(dtype=np.float64)
+
+
+def moniteur():
+    return MoniteurDerive(construire_profil(codage_modele(pd.read_csv(REFERENCE, sep=";"))), fenetre=100_000)
+
+
+def test_trafic_propre_sans_derive():
+    m = moniteur()
+    # Lignes une à une, comme /predict
+    for ligne in trafic_propre(5000):
+        m.observer(tuple(ligne))
+    rapport = m.rapport(force=True)
+    assert rapport["suffisant"]
+    assert rapport["derive"] == []
+    assert rapport["variables"]["cp"]["hors_reference"] == 0
+    assert rapport["variables"]["ca"]["hors_reference"] == 0
+
+
+def test_derive_detectee():
+    m = moniteur()
+    X = trafic_propre(5000)
+    X[:, FEATURES.index("chol")] += 80
+    m.observer(X)
+    assert m.rapport(force=True)["derive"] == ["chol"]
+
+
+def test_cp_decale_detecte():
+    m = moniteur()
+    X = trafic_propre(5000)
+    X[:, FEATURES.index("cp")] -= 1
+    m.observer(X)
+    rapport = m.rapport(force=True)
+    assert "cp" in rapport["derive"]
+    assert rapport["variables"]["cp"]["hors_reference"] > 0
@@ -0,0 +1,36 @@
+# tests/test_prediction.py
+# Un fichier du dépôt importé sur la page Prédiction est envoyé à l'API dans le codage
+# d'entraînement du modèle : les scores du lot sont ceux du modèle sur les mêmes patients.
+
+import joblib
+import numpy as np
+import pandas as pd
+
+from prediction import detecter_codage_cp, preparer_lot
+from registre import FEATURES, OPTIMISED_MODEL_PATH
+
+
+def test_x_test_score_comme_le_modele():
+    X_test = pd.read_csv("data/X_test.csv")[FEATURES]
+    y_test = pd.read_csv("data/y_test.csv").squeeze("columns")
+    model = joblib.load(OPTIMISED_MODEL_PATH)
+
+    codage = detecter_codage_cp(X_test)
+    assert codage == "Modèle (1-4)"
+    X, erreurs = preparer_lot(X_test, codage)
+    assert erreurs == []
+    assert X["cp"].between(1, 4).all()
+
+    attendu = model.predict(X_test)
+    obtenu = model.predict(X.astype(np.float64))
+    assert (obtenu == attendu).all()
+    assert (obtenu == y_test).mean() == (attendu == y_test).mean()
+
+
+def test_codage_decale_remonte():
+    X_test = pd.read_csv("data/X_test.csv")[FEATURES]
+    decale = X_test.assign(cp=X_test["cp"] - 1)
+    assert detecter_codage_cp(decale) == "Décalé (0-3)"
+    X, erreurs = preparer_lot(decale, "Décalé (0-3)")
+    assert erreurs == []
+    assert (X["cp"] == X_test["cp"]).all()
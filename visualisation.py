@@ -1,8 +1,15 @@
+import hashlib
+import io
+
 import streamlit as st
+import numpy as np
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from donnees import charger
+import graphiques_agreges as ga
+
 # === 🔁 Dictionnaire de correspondance pour affichage lisible ===
 dictionnaires_etiquettes = {
     "sex": {0: "Femme", 1: "Homme"},
@@ -16,7 +23,7 @@ dictionnaires_etiquettes = {
 @st.cache_data
 def charger_donnees():
     try:
-        data = pd.read_csv("data/clean_heart_data.csv", sep=";")
+        data = charger("clean_heart_data")
         return data
     except Exception as e:
         st.error(f"Erreur lors du chargement des données : {e}")
@@ -25,7 +32,7 @@ def charger_donnees():
 # === 🔤 Conversion des colonnes à faible cardinalité en 'category' ===
 def detecter_et_convertir_variables_qualitatives(data):
     for col in data.columns:
-        if data[col].nunique() < 10 and data[col].dtype in ['int64', 'float64']:
+        if data[col].nunique() < 10 and pd.api.types.is_numeric_dtype(data[col]):
             data[col] = data[col].astype('category')
     return data
 
@@ -82,6 +89,106 @@ def afficher_statistiques_generales(nb_patients, nb_classes, classe_dominante, p
 
     st.divider()
 
+# Au-delà de ce nombre de lignes, les graphiques sont tracés à partir d'agrégats
+# (graphiques_agreges) plutôt qu'en confiant toutes les lignes à seaborn
+SEUIL_LIGNES_BRUTES = 10_000
+
+# === 🗃️ Cache des agrégats et des figures ===
+# Les fonctions ci-dessous sont indexées sur l'empreinte du jeu de données (`cle`) et
+# les variables choisies ; les arguments préfixés par `_` ne sont pas hachés par Streamlit.
+def empreinte_donnees(data):
+    """Empreinte du contenu du DataFrame, calculée de façon vectorisée"""
+    valeurs = pd.util.hash_pandas_object(data, index=True).values
+    return hashlib.sha256(valeurs.tobytes() + ",".join(map(str, data.columns)).encode()).hexdigest()
+
+@st.cache_data(max_entries=8)
+def preparer_donnees(cle, _data):
+    """Étiquettes lisibles, types qualitatifs et résumés, calculés une fois par jeu de données"""
+    data = appliquer_etiquettes(_data, dictionnaires_etiquettes)
+    data = detecter_et_convertir_variables_qualitatives(data)
+    quantitative_vars = list(data.select_dtypes(include='number').columns)
+    resume = {
+        "nb_patients": data.shape[0],
+        "age_moyen": data["age"].mean() if "age" in data.columns else "?",
+        "quantitative_vars": quantitative_vars,
+        "qualitative_vars": list(data.select_dtypes(include=['category', 'object']).columns),
+        "correlation": data[quantitative_vars].corr(),
+    }
+    if 'num' in data.columns:
+        resume["nb_classes"] = data['num'].nunique()
+        resume["classe_dominante"] = data['num'].mode()[0]
+        resume["part_classe_dominante"] = 100 * data['num'].value_counts(normalize=True).iloc[0]
+    else:
+        resume["nb_classes"] = resume["classe_dominante"] = resume["part_classe_dominante"] = "?"
+    return data, resume
+
+@st.cache_data(max_entries=64)
+def statistiques_variables(cle, variables, _data):
+    return _data[list(variables)].describe()
+
+def figure_en_png(fig):
+    """Rend la figure en PNG puis la ferme : aucune figure ne survit au rerun"""
+    tampon = io.BytesIO()
+    fig.savefig(tampon, format="png", bbox_inches="tight", dpi=120)
+    plt.close(fig)
+    return tampon.getvalue()
+
+@st.cache_data(max_entries=128)
+def figure_quantitative(cle, var_quant, type_graphique, _data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    agrege = len(_data) > SEUIL_LIGNES_BRUTES
+    if type_graphique == "histogramme":
+        if agrege:
+            ga.tracer_histogramme(ax, ga.agreger_histogramme(_data[var_quant], bins=30))
+        else:
+            sns.histplot(_data[var_quant], kde=True, color="steelblue", bins=30, ax=ax)
+        ax.set_title(f"Distribution de {var_quant}")
+    elif agrege:
+        ga.tracer_boxplot(ax, ga.agreger_boxplot(_data[var_quant]), vertical=False)
+    else:
+        sns.boxplot(x=_data[var_quant], color="skyblue", ax=ax)
+    return figure_en_png(fig)
+
+@st.cache_data(max_entries=128)
+def figure_qualitative(cle, var_qual, type_graphique, _data):
+    if type_graphique == "comptage":
+        fig, ax = plt.subplots(figsize=(10, 6))
+        if len(_data) > SEUIL_LIGNES_BRUTES:
+            ga.tracer_comptes(ax, ga.agreger_comptes(_data[var_qual]))
+        else:
+            sns.countplot(x=var_qual, data=_data, palette="Blues", ax=ax)
+        ax.set_title(f"Répartition de {var_qual}")
+        ax.tick_params(axis="x", rotation=45)
+    else:
+        fig, ax = plt.subplots(figsize=(8, 8))
+        _data[var_qual].value_counts().plot.pie(autopct='%1.1f%%', startangle=90, cmap="Blues", ax=ax)
+        ax.set_ylabel("")
+    return figure_en_png(fig)
+
+@st.cache_data(max_entries=128)
+def figure_croisee(cle, quant_cross, qual_cross, type_graphique, _data):
+    fig, ax = plt.subplots(figsize=(10, 6))
+    agrege = len(_data) > SEUIL_LIGNES_BRUTES
+    if type_graphique == "boxplot" and agrege:
+        stats = ga.agreger_boxplots_groupes(_data, quant_cross, qual_cross)
+        ga.tracer_boxplot(ax, stats, couleurs=plt.get_cmap("cool")(np.linspace(0, 1, len(stats))))
+    elif type_graphique == "boxplot":
+        sns.boxplot(x=qual_cross, y=quant_cross, data=_data, palette="cool", ax=ax)
+    elif agrege:
+        # Moyennes par groupe avec IC analytique, au lieu du bootstrap de sns.barplot
+        ga.tracer_moyennes(ax, ga.agreger_moyennes(_data, quant_cross, qual_cross))
+    else:
+        sns.barplot(x=qual_cross, y=quant_cross, data=_data, palette="Blues", estimator="mean", ax=ax)
+    ax.tick_params(axis="x", rotation=45)
+    return figure_en_png(fig)
+
+@st.cache_data(max_entries=8)
+def figure_correlation(cle, _correlation):
+    fig, ax = plt.subplots(figsize=(12, 8))
+    sns.heatmap(_correlation, annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
+    ax.set_title("Matrice de Corrélation")
+    return figure_en_png(fig)
+
 # === 🎛️ Visualisation principale ===
 def afficher_page_visualisation(data):
     st.title("🧠 Visualisation des Données Médicales")
@@ -90,54 +197,33 @@ def afficher_page_visualisation(data):
         st.warning("Aucune donnée à afficher.")
         return
 
-    data = appliquer_etiquettes(data, dictionnaires_etiquettes)
-    data = detecter_et_convertir_variables_qualitatives(data)
-
-    nb_patients = data.shape[0]
-    if 'num' in data.columns:
-        nb_classes = data['num'].nunique()
-        classe_dominante = data['num'].mode()[0]
-        part_classe_dominante = 100 * data['num'].value_counts(normalize=True).iloc[0]
-    else:
-        nb_classes = classe_dominante = part_classe_dominante = "?"
+    cle = empreinte_donnees(data)
+    data, resume = preparer_donnees(cle, data)
 
-    age_moyen = data["age"].mean() if "age" in data.columns else "?"
-
-    afficher_statistiques_generales(nb_patients, nb_classes, classe_dominante, part_classe_dominante, age_moyen)
+    afficher_statistiques_generales(resume["nb_patients"], resume["nb_classes"], resume["classe_dominante"],
+                                    resume["part_classe_dominante"], resume["age_moyen"])
 
     # Variables quantitatives
     st.subheader("📈 Analyse des Variables Quantitatives")
-    quantitative_vars = data.select_dtypes(include=['int64', 'float64']).columns
+    quantitative_vars = resume["quantitative_vars"]
     var_quant = st.selectbox("Choisissez une variable quantitative", quantitative_vars)
 
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.histplot(data[var_quant], kde=True, color="steelblue", bins=30, ax=ax)
-    plt.title(f"Distribution de {var_quant}")
-    st.pyplot(fig)
+    st.image(figure_quantitative(cle, var_quant, "histogramme", data), use_container_width=True)
 
     st.subheader("Boxplot de la variable sélectionnée")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.boxplot(x=data[var_quant], color="skyblue", ax=ax)
-    st.pyplot(fig)
+    st.image(figure_quantitative(cle, var_quant, "boxplot", data), use_container_width=True)
     st.divider()
 
     # Variables qualitatives
     st.subheader("📊 Analyse des Variables Qualitatives")
-    qualitative_vars = data.select_dtypes(include=['category', 'object']).columns
+    qualitative_vars = resume["qualitative_vars"]
     if len(qualitative_vars) > 0:
         var_qual = st.selectbox("Choisissez une variable qualitative", qualitative_vars)
 
-        fig, ax = plt.subplots(figsize=(10, 6))
-        sns.countplot(x=var_qual, data=data, palette="Blues", ax=ax)
-        plt.title(f"Répartition de {var_qual}")
-        plt.xticks(rotation=45)
-        st.pyplot(fig)
+        st.image(figure_qualitative(cle, var_qual, "comptage", data), use_container_width=True)
 
         st.subheader("Diagramme Circulaire")
-        fig, ax = plt.subplots(figsize=(8, 8))
-        data[var_qual].value_counts().plot.pie(autopct='%1.1f%%', startangle=90, cmap="Blues", ax=ax)
-        plt.ylabel("")
-        st.pyplot(fig)
+        st.image(figure_qualitative(cle, var_qual, "camembert", data), use_container_width=True)
     else:
         st.info("Aucune variable qualitative détectée.")
     st.divider()
@@ -148,31 +234,22 @@ def afficher_page_visualisation(data):
     qual_cross = st.selectbox("Variable Qualitative", qualitative_vars, key="qual_cross")
 
     st.subheader(f"Boxplot : {quant_cross} en fonction de {qual_cross}")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.boxplot(x=qual_cross, y=quant_cross, data=data, palette="cool", ax=ax)
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    st.image(figure_croisee(cle, quant_cross, qual_cross, "boxplot", data), use_container_width=True)
 
     st.subheader(f"Barplot : Moyenne de {quant_cross} par {qual_cross}")
-    fig, ax = plt.subplots(figsize=(10, 6))
-    sns.barplot(x=qual_cross, y=quant_cross, data=data, palette="Blues", estimator="mean", ax=ax)
-    plt.xticks(rotation=45)
-    st.pyplot(fig)
+    st.image(figure_croisee(cle, quant_cross, qual_cross, "barplot", data), use_container_width=True)
     st.divider()
 
-    # Corrélation
+    # Corrélation (matrice précalculée dans preparer_donnees)
     st.subheader("🔥 Matrice de Corrélation des Variables Quantitatives")
-    fig, ax = plt.subplots(figsize=(12, 8))
-    sns.heatmap(data[quantitative_vars].corr(), annot=True, cmap="coolwarm", fmt=".2f", ax=ax)
-    plt.title("Matrice de Corrélation")
-    st.pyplot(fig)
+    st.image(figure_correlation(cle, resume["correlation"]), use_container_width=True)
     st.divider()
 
     # Statistiques détaillées
     st.subheader("📋 Statistiques Résumées")
     stats_var = st.multiselect("Sélectionnez les variables pour voir leurs statistiques", data.columns)
     if stats_var:
-        st.write(data[stats_var].describe())
+        st.write(statistiques_variables(cle, tuple(stats_var), data))
     else:
         st.warning("Aucune variable sélectionnée pour les statistiques.")
 